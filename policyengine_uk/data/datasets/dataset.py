@@ -0,0 +1,483 @@
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+)
+import h5py
+import numpy as np
+from policyengine_core.data import Dataset
+from policyengine_core.periods import period
+from policyengine_uk.data.datasets.parquet import (
+    load_parquet_dataset,
+    save_parquet_dataset,
+)
+
+try:
+    # Registers the LZ4 and Blosc filters with h5py, for reading and writing.
+    import hdf5plugin
+except ImportError:
+    hdf5plugin = None
+
+# The group holding the base arrays which replicated datasets are views of.
+REPLICATED_BASE_GROUP = "_replicated"
+
+
+class H5Layout:
+    """Storage options for the arrays in an H5 dataset file.
+
+    Args:
+        chunk_size (int, optional): The number of elements in each chunk. Defaults to None (chunked automatically if compressed, otherwise contiguous).
+        compression (str, optional): The compression filter: "gzip" or "lzf" (built into h5py), or "lz4" or "blosc" (requiring hdf5plugin). Defaults to None.
+        compression_level (int, optional): The compression level, for gzip (0-9) and Blosc (0-9). Defaults to the filter's default.
+        shuffle (bool, optional): Whether to shuffle bytes before compression, which often helps numeric arrays. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = None,
+        compression: str = None,
+        compression_level: int = None,
+        shuffle: bool = False,
+    ):
+        if compression not in (None, "gzip", "lzf", "lz4", "blosc"):
+            raise ValueError(f"Unknown H5 compression filter {compression}.")
+        self.chunk_size = chunk_size
+        self.compression = compression
+        self.compression_level = compression_level
+        self.shuffle = shuffle
+
+    def __repr__(self) -> str:
+        return (
+            f"H5Layout(chunk_size={self.chunk_size}, "
+            f"compression={self.compression}, "
+            f"compression_level={self.compression_level}, "
+            f"shuffle={self.shuffle})"
+        )
+
+    def dataset_options(self, shape: Tuple[int, ...]) -> Dict[str, Any]:
+        """Gets the h5py dataset creation options for an array.
+
+        Args:
+            shape (Tuple[int, ...]): The shape of the array.
+
+        Returns:
+            Dict[str, Any]: Keyword arguments for `create_dataset`.
+        """
+        if len(shape) == 0 or 0 in shape:
+            # Scalars and empty arrays cannot be chunked.
+            return {}
+        options = {}
+        if self.chunk_size is not None:
+            options["chunks"] = (min(self.chunk_size, shape[0]),) + tuple(
+                shape[1:]
+            )
+        if self.compression in ("gzip", "lzf"):
+            options["compression"] = self.compression
+            if self.compression_level is not None:
+                options["compression_opts"] = self.compression_level
+            options["shuffle"] = self.shuffle
+        elif self.compression is not None:
+            if hdf5plugin is None:
+                raise ImportError(
+                    f"{self.compression} compression requires hdf5plugin."
+                )
+            if self.compression == "lz4":
+                options.update(hdf5plugin.LZ4())
+                options["shuffle"] = self.shuffle
+            else:
+                options.update(
+                    hdf5plugin.Blosc(
+                        cname="lz4",
+                        clevel=(
+                            5
+                            if self.compression_level is None
+                            else self.compression_level
+                        ),
+                        shuffle=(
+                            hdf5plugin.Blosc.SHUFFLE
+                            if self.shuffle
+                            else hdf5plugin.Blosc.NOSHUFFLE
+                        ),
+                    )
+                )
+        if self.compression is not None and "chunks" not in options:
+            options["chunks"] = True
+        return options
+
+    def create_dataset(
+        self, file: h5py.File, key: str, values: Any
+    ) -> h5py.Dataset:
+        """Writes an array to an H5 file with this layout, replacing any
+        existing array under the same key.
+
+        Args:
+            file (h5py.File): The file.
+            key (str): The key.
+            values (Any): The array (or array-like).
+
+        Returns:
+            h5py.Dataset: The new H5 dataset.
+        """
+        values = np.asarray(values)
+        if key in file:
+            del file[key]
+        return file.create_dataset(
+            key, data=values, **self.dataset_options(values.shape)
+        )
+
+    def create_empty_dataset(
+        self,
+        file: h5py.File,
+        key: str,
+        shape: Tuple[int, ...],
+        dtype: np.dtype,
+    ) -> h5py.Dataset:
+        """Preallocates an array in an H5 file with this layout, to be filled
+        in later (e.g. in slices), replacing any existing array under the
+        same key.
+
+        Args:
+            file (h5py.File): The file.
+            key (str): The key.
+            shape (Tuple[int, ...]): The shape of the array.
+            dtype (np.dtype): The type of the array.
+
+        Returns:
+            h5py.Dataset: The new H5 dataset.
+        """
+        if key in file:
+            del file[key]
+        return file.create_dataset(
+            key, shape=shape, dtype=dtype, **self.dataset_options(shape)
+        )
+
+
+class UKDataset(Dataset):
+    """A dataset whose arrays are written with a configurable H5 layout."""
+
+    h5_layout: Optional[H5Layout] = None
+    """The storage layout for arrays. Defaults to contiguous, uncompressed arrays."""
+
+    memory_map: bool = False
+    """Whether `load` returns lazily memory-mapped arrays, rather than an open H5 file (for time-period-arrays datasets)."""
+
+    projected_variables: Optional[Iterable[str]] = None
+    """If set, `load` only returns these variables, rather than an open H5 file (for time-period-arrays datasets)."""
+
+    projected_until: Optional[str] = None
+    """If set, `load` skips time periods starting after this one, rather than returning an open H5 file (for time-period-arrays datasets)."""
+
+    uses_model: bool = False
+    """Whether `generate` runs simulations or reads parameters, so that `build_datasets` keys the dataset's builds on the model's variables and parameters."""
+
+    external_files: Tuple[Path, ...] = ()
+    """Files outside the dataset chain which `generate` reads (e.g. imputation models or calibration targets), whose contents key the dataset's builds."""
+
+    use_parquet: bool = False
+    """Whether `load` reads arrays from the dataset's Parquet copy (written from the H5 file when missing or older), rather than returning an open H5 file (for time-period-arrays datasets)."""
+
+    household_filters: Optional[List[Tuple[str, str, Any]]] = None
+    """If set with `use_parquet`, `load` only reads the households matching these filters on household variables (e.g. `[("region", "==", "SCOTLAND")]`), with their benefit units and people."""
+
+    @classmethod
+    def get_input_datasets(cls) -> List[Type[Dataset]]:
+        """Gets the datasets this dataset is generated from (by default, its
+        `input_dataset`, if it has one).
+
+        Returns:
+            List[Type[Dataset]]: The input datasets.
+        """
+        input_dataset = getattr(cls, "input_dataset", None)
+        return [] if input_dataset is None else [input_dataset]
+
+    def save(self, key: str, values: Any):
+        if self.h5_layout is None or self.data_format not in (
+            Dataset.ARRAYS,
+            Dataset.TIME_PERIOD_ARRAYS,
+        ):
+            return super().save(key, values)
+        with h5py.File(self.file_path, "a") as f:
+            self.h5_layout.create_dataset(f, key, values)
+
+    def save_dataset(self, data, file_path: str = None) -> None:
+        if self.h5_layout is None or self.data_format not in (
+            Dataset.ARRAYS,
+            Dataset.TIME_PERIOD_ARRAYS,
+        ):
+            return super().save_dataset(data, file_path)
+        file = file_path or self.file_path
+        if self.data_format == Dataset.TIME_PERIOD_ARRAYS:
+            with h5py.File(file, "w") as f:
+                for variable, values in data.items():
+                    for time_period, value in values.items():
+                        self.h5_layout.create_dataset(
+                            f, f"{variable}/{time_period}", value
+                        )
+        else:
+            with h5py.File(file, "w") as f:
+                for variable, value in data.items():
+                    self.h5_layout.create_dataset(f, variable, value)
+
+    @property
+    def variables(self) -> List[str]:
+        variables = super().variables
+        if self.data_format in (Dataset.ARRAYS, Dataset.TIME_PERIOD_ARRAYS):
+            # Skip private groups (e.g. the base arrays of replicates).
+            return [
+                variable
+                for variable in variables
+                if not variable.startswith("_")
+            ]
+        return variables
+
+    def load(self, key: str = None, mode: str = "r"):
+        if key is None and self.data_format == Dataset.TIME_PERIOD_ARRAYS:
+            if self.use_parquet:
+                return self.load_parquet()
+            if self.memory_map:
+                return self.load_memory_mapped()
+            if (
+                self.projected_variables is not None
+                or self.projected_until is not None
+            ):
+                return self.load_projected()
+        return super().load(key, mode)
+
+    def load_projected(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """Loads the arrays of the projected variables and time periods.
+
+        Returns:
+            Dict[str, Dict[str, np.ndarray]]: The arrays, by variable and time period.
+        """
+        with h5py.File(self.file_path, "r") as f:
+            return {
+                variable: {
+                    time_period: values[...]
+                    for time_period, values in time_periods.items()
+                }
+                for variable, time_periods in self._get_projected_arrays(f)
+            }
+
+    def _get_projected_arrays(
+        self, f: h5py.File
+    ) -> Iterator[Tuple[str, Dict[str, h5py.Dataset]]]:
+        """Gets the arrays of each variable and time period `load` returns,
+        after projecting onto `projected_variables` and `projected_until`."""
+        variables = self.variables
+        if self.projected_variables is not None:
+            projected_variables = set(self.projected_variables)
+            variables = [
+                variable
+                for variable in variables
+                if variable in projected_variables
+            ]
+        for variable in variables:
+            yield variable, {
+                time_period: f[variable][time_period]
+                for time_period in f[variable]
+                if self.projected_until is None
+                or period(time_period).start
+                <= period(self.projected_until).start
+            }
+
+    @property
+    def array_store_path(self) -> Path:
+        """The folder of NumPy files backing memory-mapped arrays which cannot
+        be mapped from the H5 file itself."""
+        file_path = Path(self.file_path)
+        return file_path.with_name(f"{file_path.stem}_arrays")
+
+    def load_memory_mapped(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """Loads each variable and time period (after any projection) as a
+        memory-mapped array, read from disk only when (and where) it is used.
+        Writes to the arrays are kept in memory, never reaching the files.
+
+        Numeric arrays are mapped in the dtypes of their variables, so that
+        simulations can use them without converting (and so reading) them.
+        Contiguous, uncompressed H5 arrays already in those dtypes are mapped
+        directly from the H5 file. Others (e.g. compressed, chunked or
+        virtual arrays) are converted once into NumPy files in
+        `array_store_path`, which are rewritten if the H5 file is newer.
+
+        Returns:
+            Dict[str, Dict[str, np.ndarray]]: The arrays, by variable and time period.
+        """
+        from policyengine_uk.system import system
+
+        file_path = Path(self.file_path)
+        modified = file_path.stat().st_mtime
+        data = {}
+        with h5py.File(file_path, "r") as f:
+            for variable, time_periods in self._get_projected_arrays(f):
+                data[variable] = {}
+                for time_period, values in time_periods.items():
+                    dtype = values.dtype
+                    if variable in system.variables and dtype.kind in "biuf":
+                        variable_dtype = np.dtype(
+                            system.variables[variable].dtype
+                        )
+                        if variable_dtype.kind in "biuf":
+                            dtype = variable_dtype
+                    if values.size == 0:
+                        data[variable][time_period] = values[...].astype(dtype)
+                    elif (
+                        dtype == values.dtype
+                        and values.chunks is None
+                        and not values.is_virtual
+                        and values.id.get_offset() is not None
+                    ):
+                        data[variable][time_period] = np.memmap(
+                            file_path,
+                            mode="c",
+                            dtype=dtype,
+                            shape=values.shape,
+                            offset=values.id.get_offset(),
+                        )
+                    else:
+                        data[variable][time_period] = self._load_array_store(
+                            variable, time_period, values, dtype, modified
+                        )
+        return data
+
+    def _load_array_store(
+        self,
+        variable: str,
+        time_period: str,
+        values: h5py.Dataset,
+        dtype: np.dtype,
+        modified: float,
+    ) -> np.ndarray:
+        """Memory-maps an array's NumPy file, writing it if it is missing or
+        older than the H5 file."""
+        array_path = self.array_store_path / variable / f"{time_period}.npy"
+        if not array_path.exists() or array_path.stat().st_mtime < modified:
+            array_path.parent.mkdir(parents=True, exist_ok=True)
+            np.save(array_path, values[...].astype(dtype))
+        return np.load(array_path, mmap_mode="c")
+
+    @property
+    def parquet_path(self) -> Path:
+        """The folder of the dataset's Parquet copy, with a file per entity."""
+        file_path = Path(self.file_path)
+        return file_path.with_name(f"{file_path.stem}_parquet")
+
+    def save_parquet(self):
+        """Writes the dataset's Parquet copy from its H5 file (for
+        time-period-arrays datasets)."""
+        save_parquet_dataset(self.load_dataset(), self.parquet_path)
+
+    def load_parquet(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """Loads the projected variables and time periods, for the households
+        matching `household_filters`, from the dataset's Parquet copy (writing
+        it first if it is missing or older than the H5 file). Numeric arrays
+        are read without copying where Arrow allows, so may be read-only.
+
+        Returns:
+            Dict[str, Dict[str, np.ndarray]]: The arrays, by variable and time period.
+        """
+        parquet_files = list(self.parquet_path.glob("*.parquet"))
+        if not parquet_files or min(
+            file.stat().st_mtime for file in parquet_files
+        ) < (Path(self.file_path).stat().st_mtime):
+            self.save_parquet()
+        return load_parquet_dataset(
+            self.parquet_path,
+            variables=self.projected_variables,
+            household_filters=self.household_filters,
+            last_time_period=self.projected_until,
+        )
+
+    def save_from_parquet(self, folder: Path = None):
+        """Writes the dataset's H5 file from a Parquet copy.
+
+        Args:
+            folder (Path, optional): The folder of Parquet files. Defaults to `parquet_path`.
+        """
+        self.save_dataset(load_parquet_dataset(folder or self.parquet_path))
+
+    def load_dataset(self):
+        if self.data_format not in (
+            Dataset.ARRAYS,
+            Dataset.TIME_PERIOD_ARRAYS,
+        ):
+            return super().load_dataset()
+        with h5py.File(self.file_path, "r") as f:
+            if self.data_format == Dataset.ARRAYS:
+                return {
+                    variable: np.array(f[variable])
+                    for variable in self.variables
+                }
+            return {
+                variable: {
+                    time_period: np.array(f[variable][time_period])
+                    for time_period in f[variable].keys()
+                }
+                for variable in self.variables
+            }
+
+    def save_replicated_dataset(
+        self,
+        data: Dict[str, Dict[str, np.ndarray]],
+        count: int,
+        stacked_variables: Iterable[str] = (),
+    ) -> None:
+        """Saves `count` stacked copies of a variable-time-period dataset
+        (as `stack_datasets` would), while storing most arrays only once.
+        Each copy is a view onto a single base array, using HDF5 virtual
+        datasets, so readers see ordinary stacked arrays. IDs (offset for
+        each copy, to stay unique) and the given stacked variables (e.g.
+        weights, so that each copy's can differ) are stored in full.
+
+        Args:
+            data (Dict[str, Dict[str, np.ndarray]]): The dataset to replicate.
+            count (int): The number of copies.
+            stacked_variables (Iterable[str], optional): Variables to store in full. Defaults to none (besides IDs).
+        """
+        from policyengine_uk.tools.stack_datasets import stack_datasets
+
+        assert self.data_format == Dataset.TIME_PERIOD_ARRAYS
+        layout = self.h5_layout or H5Layout()
+        stacked_variables = set(stacked_variables) | {
+            variable for variable in data if "_id" in variable
+        }
+        stacked = stack_datasets(
+            [
+                {
+                    variable: data[variable]
+                    for variable in data
+                    if variable in stacked_variables
+                }
+            ]
+            * count
+        )
+        with h5py.File(self.file_path, "w") as f:
+            for variable, values in data.items():
+                for time_period, value in values.items():
+                    key = f"{variable}/{time_period}"
+                    if variable in stacked_variables:
+                        layout.create_dataset(
+                            f, key, stacked[variable][time_period]
+                        )
+                        continue
+                    value = np.asarray(value)
+                    base_key = f"{REPLICATED_BASE_GROUP}/{key}"
+                    layout.create_dataset(f, base_key, value)
+                    virtual_layout = h5py.VirtualLayout(
+                        shape=(len(value) * count,) + value.shape[1:],
+                        dtype=value.dtype,
+                    )
+                    # "." refers to this file, wherever it is moved to.
+                    source = h5py.VirtualSource(
+                        ".", base_key, shape=value.shape, dtype=value.dtype
+                    )
+                    for i in range(count):
+                        virtual_layout[
+                            i * len(value) : (i + 1) * len(value)
+                        ] = source
+                    f.create_virtual_dataset(key, virtual_layout)
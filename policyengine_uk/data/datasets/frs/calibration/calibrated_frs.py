@@ -1,10 +1,11 @@
 from policyengine_core.data import Dataset
+from ...dataset import UKDataset
 import numpy as np
 from pathlib import Path
-from typing import Type
+from typing import List, Type
 import pandas as pd
 from ...utils import STORAGE_FOLDER
-from ..frs import FRS_2019_20, FRS_2020_21
+from ..frs import FRS_2019_20, FRS_2020_21, FRS_2021_22
 from ..stacked_frs import PooledFRS_2019_21
 from ..uprated_frs import UpratedFRS
 from ..spi_enhanced_frs import (
@@ -21,7 +22,7 @@ def sum_by_household(values: pd.Series, dataset: Dataset) -> np.ndarray:
     )
 
 
-class CalibratedFRS(Dataset):
+class CalibratedFRS(UKDataset):
     input_dataset: Type[Dataset]
     time_period: int
     epochs: int = None
@@ -32,6 +33,8 @@ class CalibratedFRS(Dataset):
     log_verbose: bool = False
     num_years: int = 1
     data_format: str = Dataset.TIME_PERIOD_ARRAYS
+    # Calibration simulates the dataset against targets in the parameters.
+    uses_model: bool = True
 
     @staticmethod
     def from_dataset(
@@ -57,6 +60,11 @@ class CalibratedFRS(Dataset):
 
         return CalibratedFRSFromDataset
 
+    @classmethod
+    def get_input_datasets(cls) -> List[Type[Dataset]]:
+        # Calibration also simulates the 2021 FRS.
+        return [cls.input_dataset, FRS_2021_22]
+
     def generate(self):
         from .calibrate import calibrate
 
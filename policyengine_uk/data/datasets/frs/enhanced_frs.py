@@ -1,22 +1,82 @@
+from concurrent.futures import ProcessPoolExecutor
 from policyengine_core.data import Dataset
+from ..dataset import H5Layout, UKDataset
 from pathlib import Path
 import numpy as np
-from typing import Type
+import pandas as pd
+from typing import Dict, Type
 from ..utils import STORAGE_FOLDER
 from .frs import FRS_2019_20
 from .calibration.calibrated_frs import CalibratedSPIEnhancedPooledFRS_2019_21
 from .stacked_frs import StackedFRS
 import yaml
-import copy
 
 
-class ImputationExtendedFRS(Dataset):
+def _impute(
+    imputation_model,
+    X_input: pd.DataFrame,
+    targets: Dict[str, float],
+    household_weight: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """Predicts an imputation model's outputs (in a worker process), solving
+    for the quantiles matching any target aggregates.
+
+    Args:
+        imputation_model (Imputation): The model.
+        X_input (pd.DataFrame): The model's predictors.
+        targets (Dict[str, float]): Target aggregates for outputs, if any.
+        household_weight (np.ndarray): The household weights.
+
+    Returns:
+        Dict[str, np.ndarray]: The predicted values, by output variable.
+    """
+    if len(targets) > 0:
+        target_values = [
+            targets[output] for output in imputation_model.Y_columns
+        ]
+        quantiles = imputation_model.solve_for_mean_quantiles(
+            target_values,
+            X_input,
+            household_weight,
+            max_iterations=3,
+        )
+    else:
+        quantiles = None
+    Y_output = imputation_model.predict(
+        X_input, mean_quantile=quantiles, verbose=False
+    )
+    return {
+        output_variable: Y_output[output_variable].values
+        for output_variable in Y_output.columns
+    }
+
+
+class ImputationExtendedFRS(UKDataset):
     name = "imputation_extended_frs"
     label = "Imputation-extended FRS"
     file_path = STORAGE_FOLDER / "imputation_extended_frs.h5"
+    uses_model = True
+    external_files = tuple(
+        STORAGE_FOLDER / "imputations" / file
+        for file in (
+            "consumption.pkl",
+            "wealth.pkl",
+            "vat.pkl",
+            "wealth_targets.yaml",
+            "consumption_targets.yaml",
+            "capital_gains_distribution_advani_summers.csv.gz",
+        )
+    ) + (
+        # Simulated by impute_capital_gains.
+        STORAGE_FOLDER
+        / "experimental_enhanced_frs.h5",
+    )
     data_format = Dataset.TIME_PERIOD_ARRAYS
     input_dataset = None
     num_years = 1
+    # The number of processes running imputation models (None for one per
+    # CPU).
+    max_workers = None
 
     @staticmethod
     def from_dataset(
@@ -62,42 +122,42 @@ class ImputationExtendedFRS(Dataset):
         with open(IMPUTATIONS / "consumption_targets.yaml") as f:
             consumption_targets = yaml.load(f, Loader=yaml.FullLoader)
 
-        i = 0
+        imputation_models = [consumption, vat, wealth]
         frs_household_weight = simulation.calculate("household_weight").values
-        for imputation_model, targets in zip(
-            [consumption, vat, wealth],
-            [{}, {}, {}],
-        ):
-            i += 1
-            predictors = imputation_model.X_columns
-
-            X_input = simulation.calculate_dataframe(
-                predictors, map_to="household"
-            )
-            if i == 3:
-                # WAS doesn't sample NI -> put NI households in Wales (closest aggregate)
-                X_input.loc[
-                    X_input["region"] == "NORTHERN_IRELAND", "region"
-                ] = "WALES"
-            if len(targets) > 0:
-                target_values = [
-                    targets[output] for output in imputation_model.Y_columns
-                ]
-                quantiles = imputation_model.solve_for_mean_quantiles(
-                    target_values,
-                    X_input,
+        # Every model's predictors are calculated together, once.
+        predictors = sorted(
+            set().union(*(model.X_columns for model in imputation_models))
+        )
+        # A plain DataFrame, as MicroDataFrames don't unpickle in workers.
+        X = pd.DataFrame(
+            simulation.calculate_dataframe(predictors, map_to="household")
+        )
+        X_wealth = X.copy()
+        # WAS doesn't sample NI -> put NI households in Wales (closest aggregate)
+        X_wealth.loc[X_wealth["region"] == "NORTHERN_IRELAND", "region"] = (
+            "WALES"
+        )
+
+        # The models are independent, so they predict concurrently.
+        with ProcessPoolExecutor(self.max_workers) as executor:
+            futures = [
+                executor.submit(
+                    _impute,
+                    imputation_model,
+                    X_input[imputation_model.X_columns],
+                    targets,
                     frs_household_weight,
-                    max_iterations=3,
                 )
-            else:
-                quantiles = None
-            Y_output = imputation_model.predict(
-                X_input, mean_quantile=quantiles, verbose=True
-            )
-
-            for output_variable in Y_output.columns:
-                values = Y_output[output_variable].values
-                data[output_variable] = {self.time_period: values}
+                for imputation_model, X_input, targets in zip(
+                    imputation_models,
+                    [X, X, X_wealth],
+                    [{}, {}, {}],
+                )
+            ]
+            # In model order, so that later models' outputs take precedence.
+            for future in futures:
+                for output_variable, values in future.result().items():
+                    data[output_variable] = {self.time_period: values}
 
         from policyengine_uk.tools.drop_zero_weight_households import (
             drop_zero_weight_households,
@@ -113,17 +173,16 @@ class ImputationExtendedFRS(Dataset):
 
         data = self.load_dataset()
 
-        zero_weight_copy_1 = copy.deepcopy(data)
-        zero_weight_copy_2 = copy.deepcopy(data)
-
-        for time_period in zero_weight_copy_2["household_weight"]:
-            zero_weight_copy_2["household_weight"][time_period] = (
-                np.zeros_like(
-                    zero_weight_copy_1["household_weight"][time_period]
-                )
-            )
+        # Stacking copies every array, so the copy can share them.
+        zero_weight_copy = {
+            **data,
+            "household_weight": {
+                time_period: np.zeros_like(weights)
+                for time_period, weights in data["household_weight"].items()
+            },
+        }
 
-        data = stack_datasets(data, zero_weight_copy_2)
+        data = stack_datasets(data, zero_weight_copy)
 
         self.save_dataset(data)
 
@@ -146,7 +205,7 @@ ImputedCalibratedFRS = ImputationExtendedFRS.from_dataset(
 )
 
 
-class EnhancedFRS(Dataset):
+class EnhancedFRS(UKDataset):
     name = "enhanced_frs"
     label = "Enhanced FRS"
     file_path = STORAGE_FOLDER / "enhanced_frs.h5"
@@ -154,25 +213,23 @@ class EnhancedFRS(Dataset):
     num_years = 7
     time_period = 2021
     count_copies = 4
+    input_dataset = ImputedCalibratedFRS
+    # Readable with h5py alone (unlike LZ4 or Blosc, which need hdf5plugin).
+    h5_layout = H5Layout(
+        chunk_size=2**18, compression="gzip", compression_level=1
+    )
     url = "release://policyengine/non-public-microdata/uk-2024-march-efo/enhanced_frs.h5"
 
     def generate(self):
-        from policyengine_uk.tools.stack_datasets import stack_datasets
-
-        data = ImputedCalibratedFRS().load_dataset()
-
-        copies = []
-        for _ in range(self.count_copies):
-            copies.append(copy.deepcopy(data))
+        data = self.input_dataset().load_dataset()
 
         for time_period in data["household_weight"]:
-            original_weights = data["household_weight"][time_period].copy()
-            for dataset in [data] + copies:
-                dataset["household_weight"][time_period] = original_weights / (
-                    self.count_copies + 1
-                )
-
-        for dataset in copies:
-            data = stack_datasets(data, dataset)
-
-        self.save_dataset(data)
+            data["household_weight"][time_period] = data["household_weight"][
+                time_period
+            ] / (self.count_copies + 1)
+
+        # The copies only differ in IDs and weights, so other variables are
+        # stored once and viewed by every copy.
+        self.save_replicated_dataset(
+            data, self.count_copies + 1, stacked_variables=["household_weight"]
+        )
@@ -1,4 +1,5 @@
 from policyengine_core.data import Dataset
+from ..dataset import UKDataset
 import pandas as pd
 from pandas import DataFrame
 from ..utils import (
@@ -7,8 +8,10 @@ from ..utils import (
     sum_from_positive_fields,
     sum_positive_variables,
     fill_with_mean,
+    run_cached_stage,
     STORAGE_FOLDER,
 )
+import json
 from typing import Dict, List
 import numpy as np
 from numpy import maximum as max_, where
@@ -25,7 +28,7 @@ from .raw_frs import (
 )
 
 
-class FRS(Dataset):
+class FRS(UKDataset):
     name = "frs"
     label = "Family Resources Survey"
     data_format = Dataset.ARRAYS
@@ -48,6 +51,10 @@ class FRS(Dataset):
 
         return FRSFromRawFRS
 
+    @classmethod
+    def get_input_datasets(cls) -> List[Type[Dataset]]:
+        return [] if cls.raw_frs is None else [cls.raw_frs]
+
     def generate(self):
         raw_frs_files = self.raw_frs()
         if not raw_frs_files.file_path.exists():
@@ -56,7 +63,6 @@ class FRS(Dataset):
             )
         else:
             raw_frs_files = raw_frs_files.load()
-        frs = h5py.File(self.file_path, mode="w")
         TABLES = (
             "adult",
             "child",
@@ -90,25 +96,47 @@ class FRS(Dataset):
         raw_frs_files.close()
 
         person = pd.concat([adult, child]).sort_index().fillna(0)
-        add_id_variables(frs, person, benunit, household)
-        add_personal_variables(frs, person, self.raw_frs.time_period)
-        add_benunit_variables(frs, benunit)
-        add_household_variables(frs, household, self.raw_frs.time_period)
-        add_market_income(
-            frs, person, pension, job, accounts, household, oddjob
-        )
-        add_benefit_income(frs, person, benefits, household)
-        add_expenses(
-            frs,
-            person,
-            job,
-            household,
-            maintenance,
-            mortgage,
-            childcare,
-            pen_prov,
+        year = self.raw_frs.time_period
+        # Stages whose code and inputs are unchanged since the file was last
+        # built keep their existing outputs.
+        STAGES = (
+            (add_id_variables, person, benunit, household),
+            (add_personal_variables, person, year),
+            (add_benunit_variables, benunit),
+            (add_household_variables, household, year),
+            (
+                add_market_income,
+                person,
+                pension,
+                job,
+                accounts,
+                household,
+                oddjob,
+            ),
+            (add_benefit_income, person, benefits, household),
+            (
+                add_expenses,
+                person,
+                job,
+                household,
+                maintenance,
+                mortgage,
+                childcare,
+                pen_prov,
+            ),
         )
-        frs.close()
+        with h5py.File(self.file_path, mode="a") as frs:
+            for stage, *inputs in STAGES:
+                run_cached_stage(frs, stage, *inputs, layout=self.h5_layout)
+            # Remove variables no longer written by any stage.
+            stage_variables = set()
+            for stage, *_ in STAGES:
+                stage_variables.update(
+                    json.loads(frs.attrs[f"{stage.__name__}_variables"])
+                )
+            for variable in list(frs):
+                if variable not in stage_variables:
+                    del frs[variable]
 
 
 FRS_2018_19 = FRS.from_dataset(
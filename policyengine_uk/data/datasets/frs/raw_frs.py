@@ -1,4 +1,7 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from policyengine_core.data import Dataset
+from ..dataset import UKDataset
 from pathlib import Path
 import pandas as pd
 from pandas import DataFrame
@@ -17,13 +20,15 @@ from numpy import maximum as max_, where
 from typing import Type
 
 
-class RawFRS(Dataset):
+class RawFRS(UKDataset):
     """A `Survey` instance for the Family Resources Survey."""
 
     name = "raw_frs"
     label = "Family Resources Survey"
     data_format = Dataset.TABLES
     tab_folder = None
+    # The number of threads reading TAB files (None for Python's default).
+    max_workers = None
 
     @staticmethod
     def from_folder(
@@ -44,10 +49,9 @@ class RawFRS(Dataset):
         return RawFRSFromFolder
 
     def generate(self):
-        """Generate the survey data from the original TAB files.
-
-        Args:
-            tab_folder (Path): The folder containing the original TAB files.
+        """Generate the survey data from the original TAB files. Tables are
+        parsed concurrently, and written to a new H5 store as they finish,
+        which replaces the dataset's file once every table is written.
         """
 
         tab_folder = self.tab_folder
@@ -55,65 +59,99 @@ class RawFRS(Dataset):
         if isinstance(tab_folder, str):
             tab_folder = Path(tab_folder)
 
-        # Load the data
-        tables = {}
-        for tab_file in tab_folder.glob("*.tab"):
-            table_name = tab_file.stem
-            if "frs" in table_name:
-                continue
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                tables[table_name] = pd.read_csv(
-                    tab_file, delimiter="\t"
-                ).apply(pd.to_numeric, errors="coerce")
-                tables[table_name].columns = tables[
-                    table_name
-                ].columns.str.upper()
-
-            sernum = (
-                "sernum"
-                if "sernum" in tables[table_name].columns
-                else "SERNUM"
-            )  # FRS inconsistently users sernum/SERNUM in different years
-
-            if "PERSON" in tables[table_name].columns:
-                tables[table_name]["person_id"] = (
-                    tables[table_name][sernum] * 1e2
-                    + tables[table_name].BENUNIT * 1e1
-                    + tables[table_name].PERSON
-                ).astype(int)
-
-            if "BENUNIT" in tables[table_name].columns:
-                tables[table_name]["benunit_id"] = (
-                    tables[table_name][sernum] * 1e2
-                    + tables[table_name].BENUNIT * 1e1
-                ).astype(int)
-
-            if sernum in tables[table_name].columns:
-                tables[table_name]["household_id"] = (
-                    tables[table_name][sernum] * 1e2
-                ).astype(int)
-            if table_name in ("adult", "child"):
-                tables[table_name].set_index(
-                    "person_id", inplace=True, drop=False
-                )
-            elif table_name == "benunit":
-                tables[table_name].set_index(
-                    "benunit_id", inplace=True, drop=False
+        tab_files = [
+            tab_file
+            for tab_file in tab_folder.glob("*.tab")
+            if "frs" not in tab_file.stem
+        ]
+        # Benefit units and households are filtered to those with adults.
+        deferred_tables = {}
+        # Tables are written to a new store, which replaces the old one (with
+        # any tables removed from the TAB folder) only once complete.
+        file_path = Path(self.file_path)
+        partial_path = file_path.with_name(f"{file_path.stem}_partial.h5")
+        try:
+            with ThreadPoolExecutor(self.max_workers) as executor, pd.HDFStore(
+                partial_path, "w"
+            ) as store:
+                futures = {
+                    executor.submit(read_tab_file, tab_file): tab_file.stem
+                    for tab_file in tab_files
+                }
+                for future in as_completed(futures):
+                    table_name = futures[future]
+                    if table_name in ("adult", "benunit", "househol"):
+                        deferred_tables[table_name] = future.result()
+                    else:
+                        store.put(table_name, future.result())
+                adult = deferred_tables["adult"]
+                benunit = deferred_tables["benunit"]
+                household = deferred_tables["househol"]
+                store.put("adult", adult)
+                store.put(
+                    "benunit",
+                    benunit[benunit.benunit_id.isin(adult.benunit_id)],
                 )
-            elif table_name == "househol":
-                tables[table_name].set_index(
-                    "household_id", inplace=True, drop=False
+                store.put(
+                    "househol",
+                    household[household.household_id.isin(adult.household_id)],
                 )
-        tables["benunit"] = tables["benunit"][
-            tables["benunit"].benunit_id.isin(tables["adult"].benunit_id)
-        ]
-        tables["househol"] = tables["househol"][
-            tables["househol"].household_id.isin(tables["adult"].household_id)
-        ]
-
-        # Save the data
-        self.save_dataset(tables)
+        except BaseException:
+            if partial_path.exists():
+                partial_path.unlink()
+            raise
+        os.replace(partial_path, file_path)
+        self._table_cache = {}
+
+
+def read_tab_file(tab_file: Path) -> DataFrame:
+    """Reads an FRS TAB file, with FRS blanks (single spaces) parsed as
+    missing so that numeric columns are typed by the parser, and any other
+    non-numeric values coerced to missing. Adds entity ID columns, and
+    indexes the adult, child, benefit unit and household tables by ID.
+
+    Args:
+        tab_file (Path): The TAB file.
+
+    Returns:
+        DataFrame: The table.
+    """
+    table_name = tab_file.stem
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        table = pd.read_csv(
+            tab_file, delimiter="\t", na_values=[" "], low_memory=False
+        )
+    mixed_columns = table.columns[table.dtypes == object]
+    if len(mixed_columns) > 0:
+        table[mixed_columns] = table[mixed_columns].apply(
+            pd.to_numeric, errors="coerce"
+        )
+    table.columns = table.columns.str.upper()
+
+    sernum = (
+        "sernum" if "sernum" in table.columns else "SERNUM"
+    )  # FRS inconsistently users sernum/SERNUM in different years
+
+    if "PERSON" in table.columns:
+        table["person_id"] = (
+            table[sernum] * 1e2 + table.BENUNIT * 1e1 + table.PERSON
+        ).astype(int)
+
+    if "BENUNIT" in table.columns:
+        table["benunit_id"] = (
+            table[sernum] * 1e2 + table.BENUNIT * 1e1
+        ).astype(int)
+
+    if sernum in table.columns:
+        table["household_id"] = (table[sernum] * 1e2).astype(int)
+    if table_name in ("adult", "child"):
+        table.set_index("person_id", inplace=True, drop=False)
+    elif table_name == "benunit":
+        table.set_index("benunit_id", inplace=True, drop=False)
+    elif table_name == "househol":
+        table.set_index("household_id", inplace=True, drop=False)
+    return table
 
 
 RawFRS_2019_20 = RawFRS.from_folder(
@@ -1,19 +1,65 @@
 from policyengine_core.data import Dataset
+from ..dataset import UKDataset
 from pathlib import Path
 import numpy as np
-from typing import Type
+import pandas as pd
+from typing import Dict, Mapping, Type
 from ..utils import STORAGE_FOLDER
 from .stacked_frs import PooledFRS_2019_21
 from .frs import FRS_2019_20
 from .uprated_frs import UpratedFRS
 
 
-class SPIEnhancedFRS(Dataset):
+def double_records(
+    arrays: Mapping[str, np.ndarray], imputations: pd.DataFrame = None
+) -> Dict[str, np.ndarray]:
+    """Stacks a copy of every record after the originals, writing each
+    variable into a preallocated array. The copies have zero weight, IDs
+    offset to keep them unique (e.g. [1, 2, 3] -> [11, 12, 13, 21, 22, 23]),
+    and imputed values in place of their own, where given.
+
+    Args:
+        arrays (Mapping[str, np.ndarray]): The variables (e.g. an H5 file).
+        imputations (pd.DataFrame, optional): Values for the copies, for some of the variables. Defaults to None.
+
+    Returns:
+        Dict[str, np.ndarray]: The doubled variables.
+    """
+    doubled = {}
+    for variable in arrays:
+        values = arrays[variable][...]
+        size = len(values)
+        if "_id" in variable:
+            marker = 10 ** np.ceil(np.log10(values).max())
+            doubled[variable] = np.empty(
+                2 * size, dtype=np.result_type(values, marker)
+            )
+            np.add(values, marker, out=doubled[variable][:size])
+            np.add(values, marker * 2, out=doubled[variable][size:])
+            continue
+        if imputations is not None and variable in imputations.columns:
+            second_half = imputations[variable].values
+        elif "_weight" in variable:
+            second_half = np.zeros((), dtype=values.dtype)
+        else:
+            second_half = values
+        doubled[variable] = np.empty(
+            (2 * size,) + values.shape[1:],
+            dtype=np.result_type(values, second_half),
+        )
+        doubled[variable][:size] = values
+        doubled[variable][size:] = second_half
+    return doubled
+
+
+class SPIEnhancedFRS(UKDataset):
     name = "spi_enhanced_frs"
     label = "SPI-Enhanced FRS"
     file_path = STORAGE_FOLDER / "spi_enhanced_frs.h5"
     data_format = Dataset.ARRAYS
     input_dataset = None
+    uses_model = True
+    external_files = (STORAGE_FOLDER / "imputations" / "income.pkl",)
 
     @staticmethod
     def from_dataset(
@@ -36,25 +82,6 @@ class SPIEnhancedFRS(Dataset):
         from policyengine_uk import Microsimulation
         from survey_enhance.impute import Imputation
 
-        frs = self.input_dataset().load()
-
-        new_values = {}
-
-        for variable in frs.keys():
-            if "_id" in variable:
-                # e.g. [1, 2, 3] -> [11, 12, 13, 21, 22, 23]
-                marker = 10 ** np.ceil(max(np.log10(frs[variable][...])))
-                values = list(frs[variable][...] + marker) + list(
-                    frs[variable][...] + marker * 2
-                )
-                new_values[variable] = values
-            elif "_weight" in variable:
-                new_values[variable] = list(frs[variable][...]) + list(
-                    frs[variable][...] * 0
-                )
-            else:
-                new_values[variable] = list(frs[variable][...]) * 2
-
         TARGETS = [
             1.016e12,  # From up-to-date published RTI data
             123.3e9,  # This and below from the 2019-20 SPI, uprated by 16% (2019 -> 2022)
@@ -111,12 +138,8 @@ class SPIEnhancedFRS(Dataset):
             mean_quantiles = None
 
         full_imputations = income.predict(input_df, mean_quantiles)
-        for variable in full_imputations.columns:
-            # Assign over the second half of the dataset
-            if variable in new_values.keys():
-                new_values[variable][len(new_values[variable]) // 2 :] = (
-                    full_imputations[variable].values
-                )
+        with self.input_dataset().load() as frs:
+            new_values = double_records(frs, full_imputations)
 
         self.save_dataset(new_values)
 
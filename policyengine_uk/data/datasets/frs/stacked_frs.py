@@ -1,12 +1,15 @@
 from policyengine_core.data import Dataset
+from ..dataset import H5Layout, UKDataset
+import h5py
 import numpy as np
 from pathlib import Path
+from typing import List, Type
 from ..utils import STORAGE_FOLDER
 from .frs import FRS_2018_19, FRS_2019_20, FRS_2020_21, FRS_2021_22
 from .uprated_frs import UpratedFRS
 
 
-class StackedFRS(Dataset):
+class StackedFRS(UKDataset):
     sub_datasets = []
     weighting_factors = []
 
@@ -31,32 +34,58 @@ class StackedFRS(Dataset):
 
         return StackedDatasetFromDataset
 
+    @classmethod
+    def get_input_datasets(cls) -> List[Type[Dataset]]:
+        return list(cls.sub_datasets)
+
     def generate(self):
+        """Stacks the sub-datasets, offsetting IDs so that they stay unique
+        and scaling weights by each sub-dataset's weighting factor. Each
+        output array is preallocated and filled one sub-dataset at a time, so
+        only one sub-dataset's values of one variable are held in memory.
+        """
         sub_datasets = [dataset(require=True) for dataset in self.sub_datasets]
-        variable_names = sub_datasets[0].variables
-        data = {}
-        for variable in variable_names:
-            if "_id" in variable:
-                new_ids = []
-                max_id = 0
-                for dataset in sub_datasets:
-                    new_ids.append(dataset.load(variable) + max_id)
-                    max_id += dataset.load(variable).max()
-                data[variable] = np.concatenate(new_ids)
-            elif "_weight" in variable:
-                data[variable] = np.concatenate(
-                    [
-                        dataset.load(variable) * weight
-                        for dataset, weight in zip(
-                            sub_datasets, self.weighting_factors
+        layout = self.h5_layout or H5Layout()
+        sub_files = [dataset.load() for dataset in sub_datasets]
+        try:
+            with h5py.File(self.file_path, "w") as stacked_file:
+                for variable in sub_files[0].keys():
+                    sources = [sub_file[variable] for sub_file in sub_files]
+                    if "_weight" in variable:
+                        dtype = np.result_type(
+                            *[
+                                source[:0] * weight
+                                for source, weight in zip(
+                                    sources, self.weighting_factors
+                                )
+                            ]
+                        )
+                    else:
+                        dtype = np.result_type(
+                            *[source.dtype for source in sources]
                         )
-                    ]
-                )
-            else:
-                data[variable] = np.concatenate(
-                    [dataset.load(variable) for dataset in sub_datasets]
-                )
-        self.save_dataset(data)
+                    target = layout.create_empty_dataset(
+                        stacked_file,
+                        variable,
+                        (sum(len(source) for source in sources),)
+                        + sources[0].shape[1:],
+                        dtype,
+                    )
+                    start = 0
+                    max_id = 0
+                    for source, weight in zip(sources, self.weighting_factors):
+                        values = source[...]
+                        if "_id" in variable:
+                            source_max_id = values.max()
+                            values += max_id
+                            max_id += source_max_id
+                        elif "_weight" in variable:
+                            values = values * weight
+                        target[start : start + len(values)] = values
+                        start += len(values)
+        finally:
+            for sub_file in sub_files:
+                sub_file.close()
 
 
 PooledFRS_2019_21 = StackedFRS.from_dataset(
@@ -2,9 +2,10 @@ import pandas as pd
 from policyengine_uk.data.storage import STORAGE_FOLDER
 import numpy as np
 from policyengine_core.data import Dataset
+from ..dataset import UKDataset
 
 
-class UKMOD_FRS_2018(Dataset):
+class UKMOD_FRS_2018(UKDataset):
     name = "ukmod_frs_2018"
     label = "UKMOD (2018-19 FRS)"
     data_format = Dataset.TIME_PERIOD_ARRAYS
@@ -1,11 +1,37 @@
 from policyengine_core.data import Dataset
+from policyengine_core.parameters import ParameterNode, get_parameter
+from policyengine_core.periods import Instant, period
+from ..dataset import UKDataset
 from typing import Type
 from pathlib import Path
 from ..utils import STORAGE_FOLDER
 
 
-class UpratedFRS(Dataset):
+def get_uprating_factor(
+    parameters: ParameterNode, uprating: str, start: Instant, end: Instant
+) -> float:
+    """Gets the growth of an uprating index between two instants (or 1, if
+    the index is zero at the start, as in simulations).
+
+    Args:
+        parameters (ParameterNode): The root parameter node.
+        uprating (str): The name of the uprating index parameter.
+        start (Instant): The instant to uprate from.
+        end (Instant): The instant to uprate to.
+
+    Returns:
+        float: The uprating factor.
+    """
+    index = get_parameter(parameters, uprating)
+    if index(start) == 0:
+        return 1
+    return index(end) / index(start)
+
+
+class UpratedFRS(UKDataset):
     data_format = Dataset.ARRAYS
+    # Uprating indices are read from the parameters.
+    uses_model = True
 
     @staticmethod
     def from_dataset(
@@ -24,18 +50,30 @@ class UpratedFRS(Dataset):
         return UpratedFRSFromDataset
 
     def generate(self):
-        from policyengine_uk import Microsimulation
+        from policyengine_uk.system import system
 
         input_dataset = self.input_dataset()
-        simulation = Microsimulation(dataset=self.input_dataset)
+        start = period(input_dataset.time_period).start
+        end = period(self.time_period).start
 
+        # Variables with an uprating index are multiplied by its growth, and
+        # the rest are copied through.
+        uprating_factors = {}
         data = {}
-        for variable in input_dataset.variables:
-            try:
-                data[variable] = simulation.calculate(
-                    variable, period=self.output_year
-                ).values
-            except:
-                data[variable] = input_dataset.load(variable)
+        with input_dataset.load() as f:
+            for variable in input_dataset.variables:
+                values = f[variable][...]
+                uprating = (
+                    system.variables[variable].uprating
+                    if variable in system.variables
+                    else None
+                )
+                if uprating is not None:
+                    if uprating not in uprating_factors:
+                        uprating_factors[uprating] = get_uprating_factor(
+                            system.parameters, uprating, start, end
+                        )
+                    values = values * uprating_factors[uprating]
+                data[variable] = values
 
         self.save_dataset(data)
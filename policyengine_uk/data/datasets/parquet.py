@@ -0,0 +1,229 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+import numpy as np
+from policyengine_core.periods import period
+from policyengine_core.taxbenefitsystems import TaxBenefitSystem
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+VariableTimePeriodData = Dict[str, Dict[str, np.ndarray]]
+Filters = List[Tuple[str, str, Any]]
+
+# Columns are named as in flat-file datasets (e.g. "region__2022").
+COLUMN_SEPARATOR = "__"
+# The schema metadata recording each column's NumPy dtype, so that arrays
+# convert back to exactly the dtypes they were saved with.
+DTYPES_METADATA_KEY = b"numpy_dtypes"
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The Parquet dataset backend requires pyarrow.")
+
+
+def _to_arrow(values: np.ndarray) -> "pa.Array":
+    """Converts an array to Arrow, dictionary-encoding strings (e.g. enum
+    names)."""
+    if values.dtype.kind in "SUO":
+        return pa.array(values.astype(str)).dictionary_encode()
+    return pa.array(values)
+
+
+def _to_numpy(column: "pa.ChunkedArray", dtype: np.dtype) -> np.ndarray:
+    """Converts an Arrow column to NumPy, without copying where possible (a
+    single chunk of numbers, other than bit-packed booleans)."""
+    if pa.types.is_dictionary(column.type):
+        column = column.combine_chunks()
+        names = column.dictionary.to_numpy(zero_copy_only=False).astype(dtype)
+        return names[column.indices.to_numpy(zero_copy_only=False)]
+    if column.num_chunks == 1 and dtype.kind != "b":
+        return column.chunk(0).to_numpy(zero_copy_only=True)
+    return column.to_numpy().astype(dtype, copy=False)
+
+
+def save_parquet_dataset(
+    data: VariableTimePeriodData,
+    folder: Path,
+    system: TaxBenefitSystem = None,
+    row_group_size: int = None,
+):
+    """Saves a variable-time-period dataset as one Parquet file per entity,
+    with a column for each variable and time period. Arrays convert back to
+    the same values and dtypes with `load_parquet_dataset`.
+
+    Args:
+        data (VariableTimePeriodData): The dataset.
+        folder (Path): The folder to write the files to.
+        system (TaxBenefitSystem, optional): The tax-benefit system, defining each variable's entity. Defaults to the UK system.
+        row_group_size (int, optional): The number of rows in each row group (smaller groups let filters skip more rows, at some cost to load speed). Defaults to pyarrow's default.
+    """
+    _require_pyarrow()
+    if system is None:
+        from policyengine_uk.system import system
+
+    def eternity(variable):
+        return data[variable][list(data[variable])[0]]
+
+    counts = {
+        entity.key: len(eternity(f"{entity.key}_id"))
+        for entity in system.entities
+        if f"{entity.key}_id" in data
+    }
+    columns = {entity: {} for entity in counts}
+    for variable, values in data.items():
+        for time_period, array in values.items():
+            array = np.asarray(array)
+            entity = (
+                system.variables[variable].entity.key
+                if variable in system.variables
+                else None
+            )
+            if counts.get(entity) != len(array):
+                # Variables outside the system join any entity of their size.
+                entity = next(
+                    (
+                        key
+                        for key, count in counts.items()
+                        if count == len(array)
+                    ),
+                    None,
+                )
+            if entity is None:
+                raise ValueError(
+                    f"{variable} ({time_period}) matches no entity's size."
+                )
+            columns[entity][
+                f"{variable}{COLUMN_SEPARATOR}{time_period}"
+            ] = array
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    for entity, entity_columns in columns.items():
+        table = pa.table(
+            {name: _to_arrow(array) for name, array in entity_columns.items()}
+        )
+        table = table.replace_schema_metadata(
+            {
+                DTYPES_METADATA_KEY: json.dumps(
+                    {
+                        name: array.dtype.str
+                        for name, array in entity_columns.items()
+                    }
+                )
+            }
+        )
+        pq.write_table(
+            table, folder / f"{entity}.parquet", row_group_size=row_group_size
+        )
+
+
+def _first_column(path: Path, variable: str) -> str:
+    """Gets the column of a variable's first time period in a Parquet file."""
+    prefix = f"{variable}{COLUMN_SEPARATOR}"
+    return next(
+        name for name in pq.read_schema(path).names if name.startswith(prefix)
+    )
+
+
+def _get_member_filters(
+    files: Dict[str, Path], household_filters: Filters
+) -> Dict[str, Filters]:
+    """Translates filters on household variables into filters on each
+    household-level entity's file, keeping the members of the households
+    matching the filters."""
+    household_path = files["household"]
+    filters = [
+        (_first_column(household_path, variable), operator, value)
+        for variable, operator, value in household_filters
+    ]
+    household_id = _first_column(household_path, "household_id")
+    household_ids = (
+        pq.read_table(household_path, columns=[household_id], filters=filters)
+        .column(household_id)
+        .to_numpy()
+    )
+    person_path = files["person"]
+    person_household_id = _first_column(person_path, "person_household_id")
+    person_filters = [(person_household_id, "in", household_ids.tolist())]
+    member_filters = dict(household=filters, person=person_filters)
+    if "benunit" in files:
+        person_benunit_id = _first_column(person_path, "person_benunit_id")
+        benunit_ids = (
+            pq.read_table(
+                person_path,
+                columns=[person_benunit_id],
+                filters=person_filters,
+            )
+            .column(person_benunit_id)
+            .to_numpy()
+        )
+        member_filters["benunit"] = [
+            (
+                _first_column(files["benunit"], "benunit_id"),
+                "in",
+                np.unique(benunit_ids).tolist(),
+            )
+        ]
+    return member_filters
+
+
+def load_parquet_dataset(
+    folder: Path,
+    variables: Iterable[str] = None,
+    household_filters: Filters = None,
+    last_time_period: str = None,
+) -> VariableTimePeriodData:
+    """Loads a dataset saved by `save_parquet_dataset`, reading only the
+    requested columns and (with filters) the row groups which may hold
+    matching households.
+
+    Args:
+        folder (Path): The folder of Parquet files.
+        variables (Iterable[str], optional): The variables to load. Defaults to all.
+        household_filters (Filters, optional): Filters on household variables (in their first time period), e.g. `[("region", "==", "SCOTLAND")]`, keeping only matching households and their benefit units and people. Defaults to None.
+        last_time_period (str, optional): If given, later time periods are skipped. Defaults to None.
+
+    Returns:
+        VariableTimePeriodData: The dataset.
+    """
+    _require_pyarrow()
+    folder = Path(folder)
+    files = {path.stem: path for path in sorted(folder.glob("*.parquet"))}
+    member_filters = (
+        _get_member_filters(files, household_filters)
+        if household_filters
+        else {}
+    )
+    variables = None if variables is None else set(variables)
+    data = {}
+    for entity, path in files.items():
+        schema = pq.read_schema(path)
+        dtypes = json.loads(schema.metadata[DTYPES_METADATA_KEY])
+        names = []
+        for name in schema.names:
+            variable, time_period = name.rsplit(COLUMN_SEPARATOR, 1)
+            if variables is not None and variable not in variables:
+                continue
+            if (
+                last_time_period is not None
+                and period(time_period).start > period(last_time_period).start
+            ):
+                continue
+            names.append(name)
+        table = pq.read_table(
+            path,
+            columns=names,
+            filters=member_filters.get(entity),
+            memory_map=True,
+        )
+        for name in names:
+            variable, time_period = name.rsplit(COLUMN_SEPARATOR, 1)
+            data.setdefault(variable, {})[time_period] = _to_numpy(
+                table.column(name), np.dtype(dtypes[name])
+            )
+    return data
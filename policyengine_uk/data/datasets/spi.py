@@ -1,10 +1,11 @@
 from policyengine_core.data import Dataset
+from .dataset import UKDataset
 from policyengine_uk.data.storage import STORAGE_FOLDER
 import pandas as pd
 import numpy as np
 
 
-class SPI(Dataset):
+class SPI(UKDataset):
     spi_data_file_path: str
     data_format = Dataset.TIME_PERIOD_ARRAYS
 
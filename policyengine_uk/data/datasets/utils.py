@@ -1,9 +1,15 @@
+import hashlib
+import inspect
+import json
 import pandas as pd
-from typing import List, Dict
+from types import CodeType
+from typing import Any, Callable, List, Dict, Sequence, Set
+import h5py
 import numpy as np
 from policyengine_core.data import Dataset
 import pickle
 from pathlib import Path
+from .dataset import H5Layout
 
 STORAGE_FOLDER = Path(__file__).parent.parent / "storage"
 
@@ -89,3 +95,131 @@ def fill_with_mean(
     fill_mean = table[amount][has_value].mean()
     filled_values = np.where(needs_fill, fill_mean, table[amount])
     return np.maximum(filled_values, 0) * multiplier
+
+
+def _hash_value(value: Any) -> str:
+    """Hashes a stage input: tables by content, other values by repr."""
+    if isinstance(value, pd.DataFrame):
+        content = pd.util.hash_pandas_object(value, index=True).values
+        return hashlib.sha256(
+            content.tobytes() + repr(list(value.columns)).encode()
+        ).hexdigest()
+    return hashlib.sha256(repr(value).encode()).hexdigest()
+
+
+def _get_code_names(code: CodeType) -> Set[str]:
+    """Gets the global names used by a code object and its nested code (e.g.
+    comprehensions and lambdas)."""
+    names = set(code.co_names)
+    for constant in code.co_consts:
+        if inspect.iscode(constant):
+            names |= _get_code_names(constant)
+    return names
+
+
+def _get_stage_sources(stage: Callable) -> List[str]:
+    """Gets the source of a stage and of the package functions it calls
+    (directly or through other functions), with the values of the constants
+    they use."""
+    sources = []
+    visited = set()
+    to_visit = [stage]
+    while to_visit:
+        function = to_visit.pop()
+        if function in visited:
+            continue
+        visited.add(function)
+        sources.append(inspect.getsource(function))
+        references = dict(inspect.getclosurevars(function).nonlocals)
+        for name in sorted(_get_code_names(function.__code__)):
+            if name in function.__globals__:
+                references[name] = function.__globals__[name]
+        for name, value in references.items():
+            if inspect.isfunction(value):
+                module = value.__module__ or ""
+                if module == stage.__module__ or module.startswith(
+                    "policyengine_uk"
+                ):
+                    to_visit.append(value)
+            elif isinstance(
+                value, (str, int, float, bool, tuple, list, dict, set)
+            ):
+                sources.append(f"{name}={value!r}")
+    return sources
+
+
+def get_stage_key(stage: Callable, inputs: Sequence[Any]) -> str:
+    """Gets a key identifying a dataset-building stage's code and inputs:
+    the source of the stage and of the package functions it calls (directly
+    or through other functions, e.g. `categorical`), the constants they use,
+    and the contents of its input tables.
+
+    Args:
+        stage (Callable): The stage, taking an output file and its inputs.
+        inputs (Sequence[Any]): The inputs to the stage.
+
+    Returns:
+        str: The key.
+    """
+    digest = hashlib.sha256("".join(_get_stage_sources(stage)).encode())
+    for value in inputs:
+        digest.update(_hash_value(value).encode())
+    return digest.hexdigest()
+
+
+class _StageOutput:
+    """Wraps an H5 file to record the datasets a stage writes, replacing any
+    previous versions of them."""
+
+    def __init__(self, file: h5py.File, layout: H5Layout):
+        self.file = file
+        self.layout = layout
+        self.written = []
+
+    def __setitem__(self, key: str, value: Any):
+        self.layout.create_dataset(self.file, key, value)
+        self.written.append(key)
+
+    def __getitem__(self, key: str) -> h5py.Dataset:
+        return self.file[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.file
+
+
+def run_cached_stage(
+    file: h5py.File,
+    stage: Callable,
+    *inputs: Any,
+    layout: H5Layout = None,
+) -> bool:
+    """Runs a dataset-building stage (a function writing variables to an H5
+    file), unless the file already holds the stage's outputs from identical
+    code, inputs and layout. Otherwise, the stage's previous outputs are
+    replaced.
+
+    Args:
+        file (h5py.File): The output file (opened for appending).
+        stage (Callable): The stage.
+        *inputs (Any): The inputs to the stage, after the file.
+        layout (H5Layout, optional): The storage layout for the stage's outputs. Defaults to contiguous, uncompressed arrays.
+
+    Returns:
+        bool: Whether the stage was run.
+    """
+    layout = layout or H5Layout()
+    key = get_stage_key(stage, list(inputs) + [layout])
+    key_attribute = f"{stage.__name__}_key"
+    variables_attribute = f"{stage.__name__}_variables"
+    if file.attrs.get(key_attribute) == key:
+        return False
+    for variable in json.loads(file.attrs.get(variables_attribute, "[]")):
+        if variable in file:
+            del file[variable]
+    # Clear the key first, so an interrupted stage is rerun next time.
+    file.attrs[key_attribute] = ""
+    output = _StageOutput(file, layout)
+    stage(output, *inputs)
+    file.attrs[variables_attribute] = json.dumps(output.written)
+    file.attrs[key_attribute] = key
+    return True
@@ -1,4 +1,11 @@
 from policyengine_uk.model_api import *
+from policyengine_uk.tools.branches import (
+    clear_branch_calculations,
+    temporary_branch,
+)
+from policyengine_uk.tools.variable_dependencies import (
+    get_dependent_variables,
+)
 from typing import Union, Optional
 
 
@@ -21,9 +28,11 @@ def create_expanded_ma_reform(
                 )
                 return benunit.any(child_meets_age_condition)
             if child_education_levels is not None:
-                child_meets_education_condition = np.is_in(
-                    person("education_level", period).decode_to_str(),
-                    child_education_levels,
+                education_level = person("current_education", period)
+                levels = education_level.possible_values
+                child_meets_education_condition = is_in(
+                    education_level,
+                    [levels[level] for level in child_education_levels],
                 )
                 return benunit.any(child_meets_education_condition)
             return True
@@ -124,9 +133,11 @@ def create_marriage_neutral_income_tax_reform(
                 )
                 return benunit.any(child_meets_age_condition)
             if child_education_levels is not None:
-                child_meets_education_condition = np.is_in(
-                    person("education_level", period).decode_to_str(),
-                    child_education_levels,
+                education_level = person("current_education", period)
+                levels = education_level.possible_values
+                child_meets_education_condition = is_in(
+                    education_level,
+                    [levels[level] for level in child_education_levels],
                 )
                 return benunit.any(child_meets_education_condition)
             return True
@@ -169,30 +180,33 @@ def create_marriage_neutral_income_tax_reform(
             total_income = person.benunit.sum(is_adult * income)
             has_spouse = person.benunit("is_married", period) & is_adult
 
-            originally_split_income_branch = person.simulation.get_branch(
-                "originally_split_income", clone_system=True
-            )
-            originally_split_income_branch.set_input(
-                "adjusted_net_income", period, income
-            )
-            originally_split_income_tax = person.benunit.sum(
-                originally_split_income_branch.calculate("income_tax", period)
-            )
-
             split_income = where(
                 has_spouse & person("meets_ma_neutral_tax_conditions", period),
                 total_income / 2,
                 income,
             )
-            split_income_branch = person.simulation.get_branch(
-                "split_income", clone_system=True
-            )
-            split_income_branch.set_input(
-                "adjusted_net_income", period, split_income
-            )
-            split_income_tax = person.benunit.sum(
-                split_income_branch.calculate("income_tax", period)
-            )
+            if (split_income == income).all():
+                return income
+
+            # Evaluate both allocations in one branch of the reform system,
+            # recalculating only the variables downstream of adjusted net
+            # income for the second allocation.
+            simulation = person.simulation
+            with temporary_branch(simulation, "income_allocation") as branch:
+                branch.set_input("adjusted_net_income", period, income)
+                originally_split_income_tax = person.benunit.sum(
+                    branch.calculate("income_tax", period)
+                )
+                clear_branch_calculations(
+                    branch,
+                    get_dependent_variables(
+                        simulation.tax_benefit_system, ["adjusted_net_income"]
+                    ),
+                )
+                branch.set_input("adjusted_net_income", period, split_income)
+                split_income_tax = person.benunit.sum(
+                    branch.calculate("income_tax", period)
+                )
 
             return where(
                 split_income_tax <= originally_split_income_tax,
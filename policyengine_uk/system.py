@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Iterable
 from policyengine_uk.entities import entities
 from policyengine_core.taxbenefitsystems import TaxBenefitSystem
 from policyengine_core.simulations import (
@@ -11,11 +12,15 @@ from policyengine_uk.data import (
     EnhancedFRS,
 )
 from policyengine_uk.data.storage import STORAGE_FOLDER
+from policyengine_uk.data.datasets.dataset import UKDataset
+from policyengine_core.data import Dataset
+import h5py
 import pandas as pd
 from policyengine_uk.tools.parameters import (
     backdate_parameters,
     convert_to_fiscal_year_parameters,
 )
+from policyengine_uk.tools.lha import get_freeze_periods
 
 from policyengine_uk.reforms import create_structural_reforms_from_parameters
 
@@ -42,6 +47,7 @@ class CountryTaxBenefitSystem(TaxBenefitSystem):
         self.parameters.gov.hmrc = convert_to_fiscal_year_parameters(
             self.parameters.gov.hmrc
         )
+        get_freeze_periods(self.parameters.gov.dwp.LHA.freeze)
 
 
 system = CountryTaxBenefitSystem()
@@ -87,14 +93,42 @@ class Microsimulation(CoreMicrosimulation):
     max_spiral_loops = 10
     datasets = DATASETS
 
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self,
+        *args,
+        compress_households: bool = False,
+        memory_map: bool = False,
+        target_variables: Iterable[str] = None,
+        target_period: str = None,
+        **kwargs,
+    ):
+        """
+        Args:
+            compress_households (bool, optional): Whether to merge duplicate households into single weighted households before simulating (see `compress_duplicate_households`). Results are per compressed record; use `household_compression.expand` to map them back to the original records. Defaults to False.
+            memory_map (bool, optional): Whether to memory-map the dataset's arrays, so that only the variables and years used are read from disk (see `UKDataset.load_memory_mapped`). Defaults to False.
+            target_variables (Iterable[str], optional): If given, only the dataset's variables which calculating these may depend on are loaded (see `get_reachable_variables`). Defaults to None (all variables).
+            target_period (str, optional): If given, the dataset's time periods after this one are not loaded. Defaults to None (all time periods).
+        """
+        self.household_compression = None
+        self._structural_reform_applied = False
+        self.target_variables = target_variables
+        self.target_period = target_period
+        if compress_households or memory_map:
+            args = list(args)
+            dataset = args[3] if len(args) > 3 else kwargs.get("dataset")
+            dataset = self._resolve_dataset(dataset)
+            if compress_households:
+                dataset = self._compress_dataset(dataset)
+            if memory_map:
+                dataset.memory_map = True
+            if len(args) > 3:
+                args[3] = dataset
+            else:
+                kwargs["dataset"] = dataset
         super().__init__(*args, **kwargs)
 
-        reform = create_structural_reforms_from_parameters(
-            self.tax_benefit_system.parameters, "2023-01-01"
-        )
-        if reform is not None:
-            self.apply_reform(reform)
+        if not self._structural_reform_applied:
+            self._apply_structural_reform()
 
         # Labor supply responses
 
@@ -107,6 +141,115 @@ class Microsimulation(CoreMicrosimulation):
                 )
                 employment_income.delete_arrays(known_period)
 
+    def build_from_dataset(self):
+        if self.target_variables is None and self.target_period is None:
+            return super().build_from_dataset()
+        from policyengine_uk.tools.variable_dependencies import (
+            get_reachable_variables,
+        )
+
+        if not isinstance(self.dataset, UKDataset):
+            raise ValueError("Only UK datasets can be loaded selectively.")
+        projected_variables = None
+        if self.target_variables is not None:
+            # Structural reforms may add or replace variables, so they are
+            # applied before finding the inputs the targets can reach.
+            self._apply_structural_reform()
+            weights = [
+                f"{entity.key}_weight"
+                for entity in self.tax_benefit_system.entities
+            ]
+            projected_variables = get_reachable_variables(
+                self.tax_benefit_system, list(self.target_variables) + weights
+            )
+            # Employment income inputs are moved to
+            # employment_income_before_lsr after loading.
+            if "employment_income_before_lsr" in projected_variables:
+                projected_variables.add("employment_income")
+            projected_variables.update(
+                variable
+                for variable in self.dataset.variables
+                if variable.endswith("_id") or variable.endswith("_role")
+            )
+        previous_projection = (
+            self.dataset.projected_variables,
+            self.dataset.projected_until,
+        )
+        self.dataset.projected_variables = projected_variables
+        self.dataset.projected_until = self.target_period
+        try:
+            super().build_from_dataset()
+        finally:
+            (
+                self.dataset.projected_variables,
+                self.dataset.projected_until,
+            ) = previous_projection
+
+    def _apply_structural_reform(self):
+        reform = create_structural_reforms_from_parameters(
+            self.tax_benefit_system.parameters, "2023-01-01"
+        )
+        if reform is not None:
+            self.apply_reform(reform)
+        self._structural_reform_applied = True
+
+    def _resolve_dataset(self, dataset) -> Dataset:
+        """Gets an instance of a dataset, given as a name, class or instance
+        (or None, for the default dataset)."""
+        dataset = dataset or self.default_dataset
+        if isinstance(dataset, str):
+            dataset = {d.name: d for d in self.datasets}[dataset]
+        if isinstance(dataset, type):
+            dataset = dataset(require=True)
+        return dataset
+
+    def _compress_dataset(self, dataset: Dataset) -> Dataset:
+        """Gets the compressed version of a dataset, generating it if it is
+        missing or older than the dataset's file."""
+        from policyengine_uk.tools.compress_households import (
+            COMPRESSED_ENTITIES,
+            HouseholdCompression,
+            compress_duplicate_households,
+        )
+
+        if dataset.data_format != Dataset.TIME_PERIOD_ARRAYS:
+            raise ValueError(
+                "Only time-period array datasets can be compressed."
+            )
+
+        class CompressedDataset(UKDataset):
+            name = f"{dataset.name}_compressed"
+            label = f"{dataset.label} (compressed)"
+            file_path = Path(dataset.file_path).with_name(
+                f"{dataset.name}_compressed.h5"
+            )
+            data_format = Dataset.TIME_PERIOD_ARRAYS
+            time_period = dataset.time_period
+
+        compressed_dataset = CompressedDataset()
+        file_path = Path(compressed_dataset.file_path)
+        if (
+            not file_path.exists()
+            or file_path.stat().st_mtime
+            < Path(dataset.file_path).stat().st_mtime
+        ):
+            data, compression = compress_duplicate_households(
+                dataset.load_dataset(),
+                self.default_tax_benefit_system_instance,
+            )
+            compressed_dataset.save_dataset(data)
+            with h5py.File(file_path, "a") as f:
+                for entity, household_map in compression.maps.items():
+                    f[f"_compression/{entity}"] = household_map
+        with h5py.File(file_path, "r") as f:
+            self.household_compression = HouseholdCompression(
+                {
+                    entity: f[f"_compression/{entity}"][...]
+                    for entity in COMPRESSED_ENTITIES
+                }
+            )
+        return compressed_dataset
+
 
 class IndividualSim(CoreIndividualSim):  # Deprecated
     tax_benefit_system = CountryTaxBenefitSystem
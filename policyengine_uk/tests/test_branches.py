@@ -0,0 +1,31 @@
+from policyengine_uk.system import Simulation, system
+from policyengine_uk.tools.branches import (
+    get_branch_memory_usage,
+    get_neutralized_system,
+    temporary_branch,
+)
+
+
+def test_neutralized_system_is_reused():
+    variables = ["employment_income_behavioral_response"]
+    neutralized = get_neutralized_system(system, variables)
+    assert get_neutralized_system(system, variables) is neutralized
+    assert neutralized is not system
+    assert neutralized.variables[variables[0]].is_neutralized
+    assert not system.variables[variables[0]].is_neutralized
+
+
+def test_temporary_branch_is_dropped():
+    simulation = Simulation(
+        situation={
+            "people": {"adult": {"employment_income": {2023: 30_000}}},
+        }
+    )
+    with temporary_branch(simulation, "pay_rise") as branch:
+        branch.set_input("employment_income_before_lsr", 2023, [31_000])
+        branch.calculate("income_tax", 2023)
+        assert get_branch_memory_usage(simulation)["pay_rise"] > 0
+    assert "pay_rise" not in simulation.branches
+    assert "pay_rise" not in get_branch_memory_usage(simulation)
+    assert simulation.calculate("marginal_tax_rate", 2023)[0] > 0
+    assert get_branch_memory_usage(simulation) == {}
@@ -0,0 +1,64 @@
+import numpy as np
+from policyengine_core.data import Dataset
+from policyengine_uk.data.datasets.dataset import UKDataset
+from policyengine_uk.tools.build_datasets import build_datasets
+
+
+def make_datasets(folder, scale):
+    class Base(UKDataset):
+        name = "base"
+        label = "Base"
+        file_path = folder / "base.h5"
+        data_format = Dataset.ARRAYS
+        base_scale = scale
+
+        def generate(self):
+            self.save_dataset(dict(value=np.arange(3) * self.base_scale))
+
+    class Derived(UKDataset):
+        name = "derived"
+        label = "Derived"
+        file_path = folder / "derived.h5"
+        data_format = Dataset.ARRAYS
+        input_dataset = Base
+
+        def generate(self):
+            values = self.input_dataset().load_dataset()["value"]
+            self.save_dataset(dict(value=values + 1))
+
+    return Derived
+
+
+def test_build_skips_up_to_date_datasets(tmp_path):
+    derived = make_datasets(tmp_path, 1)
+    assert build_datasets(derived, parallel=False) == ["base", "derived"]
+    assert build_datasets(derived, parallel=False) == []
+    derived = make_datasets(tmp_path, 2)
+    assert build_datasets(derived, parallel=False) == ["base", "derived"]
+    assert np.array_equal(derived().load_dataset()["value"], [1, 3, 5])
+
+
+def test_build_reruns_on_changed_model_and_files(tmp_path, monkeypatch):
+    from policyengine_uk.tools import build_datasets as builds
+
+    targets = tmp_path / "targets.yaml"
+    targets.write_text("total: 1")
+
+    class Simulated(UKDataset):
+        name = "simulated"
+        label = "Simulated"
+        file_path = tmp_path / "simulated.h5"
+        data_format = Dataset.ARRAYS
+        uses_model = True
+        external_files = (targets,)
+
+        def generate(self):
+            self.save_dataset(dict(value=np.zeros(3)))
+
+    assert build_datasets(Simulated, parallel=False) == ["simulated"]
+    assert build_datasets(Simulated, parallel=False) == []
+    targets.write_text("total: 2")
+    assert build_datasets(Simulated, parallel=False) == ["simulated"]
+    monkeypatch.setattr(builds, "get_model_key", lambda: "changed")
+    assert build_datasets(Simulated, parallel=False) == ["simulated"]
+    assert build_datasets(Simulated, parallel=False) == []
@@ -0,0 +1,59 @@
+import numpy as np
+from policyengine_core.data import Dataset
+from policyengine_uk import Microsimulation
+from policyengine_uk.data.datasets.dataset import UKDataset
+from policyengine_uk.system import system
+from policyengine_uk.tools.compress_households import (
+    compress_duplicate_households,
+)
+from policyengine_uk.tools.stack_datasets import stack_datasets
+
+DATA = {
+    "person_id": {2022: np.array([1, 2, 3, 4, 5, 6, 7])},
+    "benunit_id": {2022: np.array([1, 2, 3, 4])},
+    "household_id": {2022: np.array([1, 2, 3])},
+    "person_benunit_id": {2022: np.array([1, 1, 2, 3, 2, 4, 4])},
+    "person_household_id": {2022: np.array([1, 1, 2, 2, 2, 3, 3])},
+    "state_id": {2022: np.array([1])},
+    "person_state_id": {2022: np.ones(7, dtype=int)},
+    "household_weight": {2022: np.array([1.0, 2.0, 3.0])},
+    "age": {2022: np.array([30, 30, 40, 20, 10, 30, 30])},
+    # The third household only differs from the first in who earns.
+    "employment_income": {
+        2022: np.array([20_000.0, 0, 15_000, 30_000, 0, 0, 20_000])
+    },
+}
+
+
+def test_duplicates_merge_with_summed_weights():
+    stacked = stack_datasets([DATA] * 3)
+    compressed, compression = compress_duplicate_households(stacked, system)
+    assert np.array_equal(compressed["household_id"][2022], [1, 2, 3])
+    assert np.allclose(compressed["household_weight"][2022], [3, 6, 9])
+    for variable in ("age", "employment_income"):
+        assert np.array_equal(
+            compression.expand(compressed[variable][2022], "person"),
+            stacked[variable][2022],
+        )
+
+
+def test_compressed_microsimulation_matches(tmp_path):
+    class StackedDataset(UKDataset):
+        name = "stacked"
+        label = "Stacked"
+        file_path = tmp_path / "stacked.h5"
+        data_format = Dataset.TIME_PERIOD_ARRAYS
+        time_period = 2022
+
+    StackedDataset().save_dataset(stack_datasets([DATA] * 3))
+    full = Microsimulation(dataset=StackedDataset)
+    compressed = Microsimulation(
+        dataset=StackedDataset, compress_households=True
+    )
+    assert len(compressed.calculate("household_id", 2022)) == 3
+    income_tax = compressed.calculate("income_tax", 2022)
+    assert np.allclose(income_tax.sum(), full.calculate("income_tax").sum())
+    assert np.allclose(
+        compressed.household_compression.expand(income_tax.values, "person"),
+        full.calculate("income_tax", 2022).values,
+    )
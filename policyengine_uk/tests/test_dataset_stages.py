@@ -0,0 +1,53 @@
+import h5py
+import numpy as np
+import pandas as pd
+from policyengine_uk.data.datasets.utils import run_cached_stage
+
+
+def add_doubled_values(file, table: pd.DataFrame):
+    file["doubled_value"] = table.value * 2
+
+
+def test_cached_stage_only_reruns_on_changed_inputs(tmp_path):
+    table = pd.DataFrame({"value": [1, 2, 3]})
+    with h5py.File(tmp_path / "dataset.h5", "a") as file:
+        assert run_cached_stage(file, add_doubled_values, table)
+        assert not run_cached_stage(file, add_doubled_values, table.copy())
+        table.loc[0, "value"] = 4
+        assert run_cached_stage(file, add_doubled_values, table)
+        assert np.array_equal(file["doubled_value"][...], [8, 4, 6])
+
+
+FACTOR = 2
+
+
+def _scale(values):
+    return values * FACTOR
+
+
+def _offset(values):
+    return _scale(values) + 1
+
+
+def add_offset_values(file, table: pd.DataFrame):
+    file["offset_value"] = _offset(table.value)
+
+
+def test_cached_stage_reruns_on_changed_helpers(tmp_path):
+    table = pd.DataFrame({"value": [1, 2, 3]})
+    with h5py.File(tmp_path / "dataset.h5", "a") as file:
+        assert run_cached_stage(file, add_offset_values, table)
+        assert not run_cached_stage(file, add_offset_values, table)
+        # Constants and helpers called through other helpers are keyed.
+        globals()["FACTOR"] = 3
+        try:
+            assert run_cached_stage(file, add_offset_values, table)
+        finally:
+            globals()["FACTOR"] = 2
+        original_scale = _scale
+        globals()["_scale"] = lambda values: values * 4
+        try:
+            assert run_cached_stage(file, add_offset_values, table)
+            assert np.array_equal(file["offset_value"][...], [5, 9, 13])
+        finally:
+            globals()["_scale"] = original_scale
@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+from policyengine_uk.data.datasets.frs.spi_enhanced_frs import double_records
+
+
+def test_copies_have_new_ids_zero_weights_and_imputations():
+    doubled = double_records(
+        {
+            "person_id": np.array([1, 2, 3]),
+            "person_weight": np.array([1.0, 2.0, 3.0]),
+            "age": np.array([30, 40, 50]),
+            "employment_income": np.array([0.0, 1.0, 2.0]),
+        },
+        pd.DataFrame(dict(employment_income=[5.0, 6.0, 7.0], gift_aid=1.0)),
+    )
+    assert np.array_equal(doubled["person_id"], [11, 12, 13, 21, 22, 23])
+    assert np.array_equal(doubled["person_weight"], [1, 2, 3, 0, 0, 0])
+    assert np.array_equal(doubled["age"], [30, 40, 50] * 2)
+    assert np.array_equal(doubled["employment_income"], [0, 1, 2, 5, 6, 7])
+    assert "gift_aid" not in doubled
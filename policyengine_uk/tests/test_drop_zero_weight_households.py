@@ -0,0 +1,36 @@
+import numpy as np
+from policyengine_core.data import Dataset
+from policyengine_uk.data.datasets.dataset import UKDataset
+from policyengine_uk.tools.drop_zero_weight_households import (
+    drop_zero_weight_households,
+)
+
+
+def test_drops_households_with_zero_weight_in_every_year(tmp_path):
+    class WeightedDataset(UKDataset):
+        name = "weighted"
+        label = "Weighted"
+        file_path = tmp_path / "weighted.h5"
+        data_format = Dataset.TIME_PERIOD_ARRAYS
+        time_period = 2022
+
+    WeightedDataset().save_dataset(
+        {
+            "person_id": {2022: np.array([1, 2, 3, 4, 5])},
+            "benunit_id": {2022: np.array([1, 2, 3])},
+            "household_id": {2022: np.array([1, 2, 3])},
+            "person_benunit_id": {2022: np.array([1, 1, 2, 3, 3])},
+            "person_household_id": {2022: np.array([1, 1, 2, 3, 3])},
+            "household_weight": {
+                2022: np.array([1.0, 0.0, 0.0]),
+                2023: np.array([1.0, 0.0, 2.0]),
+            },
+            "age": {2022: np.array([30, 31, 40, 50, 51])},
+        }
+    )
+    drop_zero_weight_households(WeightedDataset)
+    data = WeightedDataset().load_dataset()
+    assert np.array_equal(data["household_id"]["2022"], [1, 3])
+    assert np.array_equal(data["benunit_id"]["2022"], [1, 3])
+    assert np.array_equal(data["age"]["2022"], [30, 31, 50, 51])
+    assert np.array_equal(data["household_weight"]["2023"], [1.0, 2.0])
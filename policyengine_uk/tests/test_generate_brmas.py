@@ -0,0 +1,24 @@
+import numpy as np
+from policyengine_uk.data.gov import lha_list_of_rents
+from policyengine_uk.tools.generate_brmas import DEFAULT_BRMA, sample_brmas
+
+
+def test_sampled_brmas_are_reproducible_and_in_region():
+    regions = np.array(["LONDON", "WALES", "SCOTLAND", "UNKNOWN"] * 50)
+    categories = np.array(["A", "B", "C", "D", "E"] * 40)
+    household_id = np.arange(200)[::-1]
+    brmas = sample_brmas(
+        regions, categories, np.arange(200), household_id, seed=1
+    )
+    assert (
+        brmas
+        == sample_brmas(
+            regions, categories, np.arange(200), household_id, seed=1
+        )
+    ).all()
+    brma_regions = dict(zip(lha_list_of_rents.brma, lha_list_of_rents.region))
+    for brma, region in zip(brmas, regions[household_id]):
+        if region == "UNKNOWN":
+            assert brma == DEFAULT_BRMA
+        else:
+            assert brma_regions[brma] == region
@@ -0,0 +1,67 @@
+from pathlib import Path
+import h5py
+import numpy as np
+from policyengine_core.data import Dataset
+from policyengine_uk.data.datasets.dataset import H5Layout, UKDataset
+from policyengine_uk.tools.stack_datasets import stack_datasets
+
+
+def test_compressed_layout_round_trips(tmp_path: Path):
+    class CompressedDataset(UKDataset):
+        name = "compressed"
+        label = "Compressed"
+        file_path = tmp_path / "compressed.h5"
+        data_format = Dataset.TIME_PERIOD_ARRAYS
+        h5_layout = H5Layout(chunk_size=100, compression="gzip", shuffle=True)
+
+    data = {
+        "employment_income": {"2022": np.arange(1_000, dtype=float)},
+        "gender": {"2022": np.array([b"MALE", b"FEMALE"] * 500)},
+    }
+    dataset = CompressedDataset()
+    dataset.save_dataset(data)
+    with h5py.File(dataset.file_path, "r") as f:
+        assert f["employment_income/2022"].compression == "gzip"
+        assert f["employment_income/2022"].chunks == (100,)
+    loaded = dataset.load_dataset()
+    for variable in data:
+        assert np.array_equal(loaded[variable]["2022"], data[variable]["2022"])
+
+
+def test_replicated_dataset_matches_stacked_copies(tmp_path: Path):
+    class ReplicatedDataset(UKDataset):
+        name = "replicated"
+        label = "Replicated"
+        file_path = tmp_path / "replicated.h5"
+        data_format = Dataset.TIME_PERIOD_ARRAYS
+
+    data = {
+        "household_id": {"2022": np.array([1, 2, 3])},
+        "household_weight": {"2022": np.array([1.0, 2.0, 3.0])},
+        "rent": {"2022": np.array([100.0, 0.0, 250.0])},
+    }
+    dataset = ReplicatedDataset()
+    dataset.save_replicated_dataset(data, 3, ["household_weight"])
+    loaded = dataset.load_dataset()
+    stacked = stack_datasets([data] * 3)
+    assert dataset.variables == sorted(data)
+    for variable in data:
+        assert np.array_equal(
+            loaded[variable]["2022"], stacked[variable]["2022"]
+        )
+    with h5py.File(dataset.file_path, "r") as f:
+        assert f["rent/2022"].is_virtual
+
+
+def test_saving_arrays_replaces_the_file(tmp_path: Path):
+    class ArraysDataset(UKDataset):
+        name = "arrays"
+        label = "Arrays"
+        file_path = tmp_path / "arrays.h5"
+        data_format = Dataset.ARRAYS
+        h5_layout = H5Layout(compression="gzip")
+
+    dataset = ArraysDataset()
+    dataset.save_dataset({"age": np.arange(3), "rent": np.zeros(3)})
+    dataset.save_dataset({"age": np.arange(3)})
+    assert dataset.variables == ["age"]
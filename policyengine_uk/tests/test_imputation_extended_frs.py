@@ -0,0 +1,118 @@
+import sys
+from types import ModuleType
+import numpy as np
+import pandas as pd
+from policyengine_core.data import Dataset
+from policyengine_uk.data.datasets.dataset import UKDataset
+from policyengine_uk.data.datasets.frs import enhanced_frs
+from policyengine_uk.data.datasets.frs.enhanced_frs import (
+    ImputationExtendedFRS,
+)
+
+
+class StubImputation:
+    """Predicts a constant for each output, plus one for Northern Irish
+    households if the model sees region, checking that it receives exactly
+    its own predictors. Defined at module level so that it pickles into the
+    worker processes."""
+
+    def __init__(self, value, X_columns, Y_columns):
+        self.value = value
+        self.X_columns = X_columns
+        self.Y_columns = Y_columns
+
+    def predict(self, X_input, mean_quantile=None, verbose=True):
+        assert list(X_input.columns) == self.X_columns
+        values = np.full(len(X_input), float(self.value))
+        if "region" in X_input:
+            values += X_input["region"].values == "NORTHERN_IRELAND"
+        return pd.DataFrame({column: values for column in self.Y_columns})
+
+
+STUB_MODELS = dict(
+    consumption=StubImputation(
+        1,
+        ["household_weight", "region"],
+        [
+            "food_and_non_alcoholic_beverages_consumption",
+            "alcohol_and_tobacco_consumption",
+        ],
+    ),
+    vat=StubImputation(
+        2,
+        ["household_weight"],
+        [
+            "clothing_and_footwear_consumption",
+            "alcohol_and_tobacco_consumption",
+        ],
+    ),
+    wealth=StubImputation(
+        3, ["region"], ["owned_land", "alcohol_and_tobacco_consumption"]
+    ),
+)
+
+
+def test_imputation_models_get_their_own_predictors(tmp_path, monkeypatch):
+    class SmallDataset(UKDataset):
+        name = "small"
+        label = "Small"
+        file_path = tmp_path / "small.h5"
+        data_format = Dataset.TIME_PERIOD_ARRAYS
+        time_period = 2022
+
+    SmallDataset().save_dataset(
+        {
+            "person_id": {2022: np.array([1, 2])},
+            "benunit_id": {2022: np.array([1, 2])},
+            "household_id": {2022: np.array([1, 2])},
+            "state_id": {2022: np.array([1])},
+            "person_benunit_id": {2022: np.array([1, 2])},
+            "person_household_id": {2022: np.array([1, 2])},
+            "person_state_id": {2022: np.array([1, 1])},
+            "household_weight": {2022: np.array([1.0, 2.0])},
+            "region": {2022: np.array([b"NORTHERN_IRELAND", b"LONDON"])},
+        }
+    )
+
+    survey_enhance = ModuleType("survey_enhance")
+    survey_enhance.Imputation = type(
+        "Imputation",
+        (),
+        dict(load=staticmethod(lambda path: STUB_MODELS[path.stem])),
+    )
+    monkeypatch.setitem(sys.modules, "survey_enhance", survey_enhance)
+    # The capital gains model needs torch and the experimental dataset.
+    capital_gains = ModuleType("capital_gains")
+    capital_gains.impute_capital_gains = lambda year: (
+        np.zeros(4),
+        np.ones(4),
+    )
+    monkeypatch.setitem(
+        sys.modules,
+        "policyengine_uk.data.datasets.frs.imputations.capital_gains",
+        capital_gains,
+    )
+    monkeypatch.setattr(enhanced_frs, "STORAGE_FOLDER", tmp_path)
+    (tmp_path / "imputations").mkdir()
+    for targets in ("wealth_targets.yaml", "consumption_targets.yaml"):
+        (tmp_path / "imputations" / targets).write_text("{}")
+
+    ExtendedDataset = ImputationExtendedFRS.from_dataset(
+        SmallDataset, "small_extended"
+    )
+    ExtendedDataset.max_workers = 2
+    ExtendedDataset().generate()
+    data = ExtendedDataset().load_dataset()
+    # Consumption sees Northern Ireland; wealth sees it remapped to Wales.
+    assert np.array_equal(
+        data["food_and_non_alcoholic_beverages_consumption"]["2022"][:2],
+        [2, 1],
+    )
+    assert np.array_equal(data["owned_land"]["2022"][:2], [3, 3])
+    assert np.array_equal(
+        data["clothing_and_footwear_consumption"]["2022"][:2], [2, 2]
+    )
+    # The wealth model comes last, so its outputs take precedence.
+    assert np.array_equal(
+        data["alcohol_and_tobacco_consumption"]["2022"][:2], [3, 3]
+    )
@@ -0,0 +1,53 @@
+from policyengine_uk import Simulation
+from policyengine_core.reforms import Reform
+from policyengine_uk.tools.labor_supply_responses import (
+    calculate_lsr_scenarios,
+)
+import numpy as np
+
+INCOME_ELASTICITY = -0.05
+SUBSTITUTION_ELASTICITY = 0.2
+
+reform = Reform.from_dict(
+    {
+        "gov.simulation.labor_supply_responses.income_elasticity": {
+            "2020-01-01.2030-01-01": INCOME_ELASTICITY
+        },
+        "gov.simulation.labor_supply_responses.substitution_elasticity": {
+            "2020-01-01.2030-01-01": SUBSTITUTION_ELASTICITY
+        },
+        "gov.hmrc.income_tax.rates.uk[0].rate": {
+            "2020-01-01.2030-01-01": 0.25
+        },
+    },
+    country_id="uk",
+)
+
+situation = {
+    "people": {
+        "adult_1": {"age": {2023: 30}, "employment_income": {2023: 30_000}},
+        "adult_2": {"age": {2023: 30}, "employment_income": {2023: 60_000}},
+    },
+    "benunits": {"benunit": {"members": ["adult_1", "adult_2"]}},
+    "households": {"household": {"members": ["adult_1", "adult_2"]}},
+}
+
+
+def test_lsr_scenarios_match_full_simulation():
+    simulation = Simulation(situation=situation, reform=reform)
+    scenarios = calculate_lsr_scenarios(
+        Simulation(situation=situation, reform=reform),
+        [(INCOME_ELASTICITY, SUBSTITUTION_ELASTICITY), (0, 0)],
+        2023,
+    )
+    scenario = scenarios[INCOME_ELASTICITY, SUBSTITUTION_ELASTICITY]
+    for variable in (
+        "employment_income_behavioral_response",
+        "household_net_income",
+    ):
+        assert np.allclose(
+            scenario[variable], simulation.calculate(variable, 2023)
+        )
+    assert (
+        scenarios[0, 0]["employment_income_behavioral_response"] == 0
+    ).all()
@@ -0,0 +1,45 @@
+from policyengine_core import periods
+from policyengine_uk.data.gov import lha_list_of_rents
+from policyengine_uk.system import system
+from policyengine_uk.tools.lha import (
+    find_freeze_start,
+    get_lha_rate_table,
+    get_lha_rent_index,
+)
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("percentile", [0, 0.3, 0.5, 1])
+def test_lha_rent_index_matches_pandas_quantiles(percentile: float):
+    rent_index = get_lha_rent_index()
+    rents = lha_list_of_rents[lha_list_of_rents.year == 2020]
+    expected = (
+        rents.groupby(["brma", "lha_category"])
+        .weekly_rent.quantile(percentile)
+        .unstack()
+        .loc[rent_index.brmas, rent_index.categories]
+        .values
+    )
+    assert np.array_equal(rent_index.quantiles(2020, percentile), expected)
+
+
+def test_find_freeze_start_follows_parameter_updates():
+    freeze = system.parameters.gov.dwp.LHA.freeze.clone()
+    assert find_freeze_start(freeze, "2022-01-01") == "2020-01-01"
+    assert find_freeze_start(freeze, "2025-01-01") is None
+    freeze.update(start=periods.instant("2026-01-01"), value=True)
+    assert find_freeze_start(freeze, "2027-01-01") == "2026-01-01"
+
+
+def test_lha_rate_table_rejects_unknown_names():
+    rent_index = get_lha_rent_index()
+    private_rent_index = system.parameters.gov.indices.private_rent_index
+    with pytest.raises(ValueError, match="NOWHERE"):
+        get_lha_rate_table(
+            [rent_index.brmas[0], "NOWHERE"],
+            list(rent_index.categories),
+            2020,
+            0.3,
+            private_rent_index,
+        )
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from policyengine_uk.system import CountryTaxBenefitSystem, Simulation
+from policyengine_uk.reforms.cps.marriage_tax_reforms import (
+    create_expanded_ma_reform,
+    create_marriage_neutral_income_tax_reform,
+)
+
+situation = {
+    "people": {
+        "earner": {
+            "age": {2023: 40},
+            "employment_income": {2023: 100_000},
+            "marital_status": {2023: "MARRIED"},
+        },
+        "partner": {
+            "age": {2023: 40},
+            "marital_status": {2023: "MARRIED"},
+        },
+        "child": {"age": {2023: 5}},
+    },
+    "benunits": {
+        "benunit": {
+            "members": ["earner", "partner", "child"],
+            "is_married": {2023: True},
+        }
+    },
+    "households": {"household": {"members": ["earner", "partner", "child"]}},
+}
+
+
+def test_marriage_neutral_income_tax_splits_income():
+    simulation = Simulation(
+        tax_benefit_system=CountryTaxBenefitSystem(
+            reform=create_marriage_neutral_income_tax_reform(max_child_age=18)
+        ),
+        situation=situation,
+    )
+    assert np.allclose(
+        simulation.calculate("adjusted_net_income", 2023),
+        [50_000, 50_000, 0],
+    )
+    income_tax = simulation.calculate("income_tax", 2023)
+    assert income_tax[0] == income_tax[1]
+    assert "income_allocation" not in simulation.branches
+
+
+@pytest.mark.parametrize(
+    "create_reform, condition",
+    [
+        (
+            create_marriage_neutral_income_tax_reform,
+            "meets_ma_neutral_tax_conditions",
+        ),
+        (create_expanded_ma_reform, "meets_expanded_ma_conditions"),
+    ],
+)
+def test_child_education_conditions(create_reform, condition):
+    # The five-year-old child has not completed primary education.
+    for levels, expected in [
+        (["NOT_COMPLETED_PRIMARY", "PRIMARY"], True),
+        (["TERTIARY"], False),
+    ]:
+        simulation = Simulation(
+            tax_benefit_system=CountryTaxBenefitSystem(
+                reform=create_reform(child_education_levels=levels)
+            ),
+            situation=situation,
+        )
+        assert (simulation.calculate(condition, 2023) == expected).all()
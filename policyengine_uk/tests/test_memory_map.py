@@ -0,0 +1,45 @@
+import numpy as np
+from policyengine_core.data import Dataset
+from policyengine_uk import Microsimulation
+from policyengine_uk.data.datasets.dataset import UKDataset
+
+
+def test_memory_mapped_simulation_matches(tmp_path):
+    class SmallDataset(UKDataset):
+        name = "small"
+        label = "Small"
+        file_path = tmp_path / "small.h5"
+        data_format = Dataset.TIME_PERIOD_ARRAYS
+        time_period = 2022
+
+    SmallDataset().save_dataset(
+        {
+            "person_id": {2022: np.array([1, 2, 3], dtype=np.int32)},
+            "benunit_id": {2022: np.array([1, 2], dtype=np.int32)},
+            "household_id": {2022: np.array([1, 2], dtype=np.int32)},
+            "state_id": {2022: np.array([1], dtype=np.int32)},
+            "person_benunit_id": {2022: np.array([1, 1, 2], dtype=np.int32)},
+            "person_household_id": {2022: np.array([1, 1, 2], dtype=np.int32)},
+            "person_state_id": {2022: np.ones(3, dtype=np.int32)},
+            "household_weight": {2022: np.array([1.0, 2.0])},
+            "age": {2022: np.array([30, 30, 70])},
+            "employment_income": {
+                2022: np.array([20_000, 60_000, 0], dtype=np.float32)
+            },
+        }
+    )
+    data = SmallDataset()
+    data.memory_map = True
+    loaded = data.load()
+    # Mapped from the H5 file (as stored in the variable's dtype)...
+    assert isinstance(loaded["employment_income"]["2022"], np.memmap)
+    # ...or converted into the NumPy file store first.
+    assert (data.array_store_path / "age" / "2022.npy").exists()
+    assert loaded["age"]["2022"].dtype == np.float32
+
+    full = Microsimulation(dataset=SmallDataset)
+    mapped = Microsimulation(dataset=SmallDataset, memory_map=True)
+    assert np.allclose(
+        mapped.calculate("income_tax", 2022).values,
+        full.calculate("income_tax", 2022).values,
+    )
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from policyengine_core.data import Dataset
+from policyengine_uk import Microsimulation
+from policyengine_uk.data.datasets.dataset import UKDataset
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def small_dataset(tmp_path):
+    class SmallDataset(UKDataset):
+        name = "small"
+        label = "Small"
+        file_path = tmp_path / "small.h5"
+        data_format = Dataset.TIME_PERIOD_ARRAYS
+        time_period = 2022
+
+    SmallDataset().save_dataset(
+        {
+            "person_id": {2022: np.array([1, 2, 3, 4], dtype=np.int32)},
+            "benunit_id": {2022: np.array([1, 2, 3])},
+            "household_id": {2022: np.array([1, 2])},
+            "state_id": {2022: np.array([1])},
+            "person_benunit_id": {2022: np.array([1, 1, 2, 3])},
+            "person_household_id": {2022: np.array([1, 1, 2, 2])},
+            "person_state_id": {2022: np.ones(4, dtype=int)},
+            "household_weight": {
+                2022: np.array([1.0, 2.0]),
+                2023: np.array([1.5, 2.5]),
+            },
+            "region": {2022: np.array([b"SCOTLAND", b"LONDON"])},
+            "age": {2022: np.array([30, 30, 70, 20], dtype=np.int16)},
+            "employment_income": {
+                2022: np.array([20_000, 60_000, 0, 15_000], dtype=np.float32)
+            },
+            "is_married": {2022: np.array([True, False, False])},
+        }
+    )
+    return SmallDataset
+
+
+def test_parquet_round_trip_is_lossless(small_dataset):
+    data = small_dataset()
+    data.save_parquet()
+    original = data.load_dataset()
+    data.use_parquet = True
+    loaded = data.load()
+    assert loaded.keys() == original.keys()
+    for variable, time_periods in original.items():
+        assert loaded[variable].keys() == time_periods.keys()
+        for time_period, values in time_periods.items():
+            assert loaded[variable][time_period].dtype == values.dtype
+            assert np.array_equal(loaded[variable][time_period], values)
+
+    data.file_path.unlink()
+    data.save_from_parquet()
+    assert data.load_dataset()["region"]["2022"].tolist() == [
+        b"SCOTLAND",
+        b"LONDON",
+    ]
+
+
+def test_household_filters_keep_members(small_dataset):
+    data = small_dataset()
+    data.use_parquet = True
+    data.household_filters = [("region", "==", "SCOTLAND")]
+    data.projected_until = "2022"
+    loaded = data.load()
+    assert loaded["household_id"]["2022"].tolist() == [1]
+    assert loaded["person_id"]["2022"].tolist() == [1, 2]
+    assert loaded["benunit_id"]["2022"].tolist() == [1]
+    assert loaded["is_married"]["2022"].tolist() == [True]
+    assert list(loaded["household_weight"]) == ["2022"]
+
+
+def test_parquet_simulation_matches(small_dataset):
+    class ParquetDataset(small_dataset):
+        use_parquet = True
+
+    full = Microsimulation(dataset=small_dataset)
+    from_parquet = Microsimulation(dataset=ParquetDataset)
+    assert np.allclose(
+        from_parquet.calculate("income_tax", 2022).values,
+        full.calculate("income_tax", 2022).values,
+    )
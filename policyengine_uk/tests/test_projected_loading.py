@@ -0,0 +1,125 @@
+import numpy as np
+from policyengine_core.data import Dataset
+from policyengine_core.reforms import Reform
+from policyengine_uk import Microsimulation
+from policyengine_uk.data.datasets.dataset import UKDataset
+from policyengine_uk.system import system
+from policyengine_uk.tools.variable_dependencies import (
+    get_reachable_variables,
+)
+
+
+def test_reachable_variables_follow_formulas():
+    reachable = get_reachable_variables(system, ["is_adult"])
+    assert reachable == {"is_adult", "age"}
+    assert "employment_income" in get_reachable_variables(
+        system, ["income_tax"]
+    )
+
+
+def test_reachable_variables_follow_baseline_changes():
+    # change_over_baseline formulas name their variables through a closure.
+    assert {
+        "expected_ltt",
+        "baseline_expected_ltt",
+        "main_residence_value",
+        "property_purchased",
+    } <= get_reachable_variables(system, ["change_in_expected_ltt"])
+    assert {
+        "fuel_duty",
+        "baseline_fuel_duty",
+        "petrol_spending",
+        "diesel_spending",
+    } <= get_reachable_variables(system, ["change_in_fuel_duty"])
+
+
+def test_only_reachable_inputs_are_loaded(tmp_path):
+    class SmallDataset(UKDataset):
+        name = "small"
+        label = "Small"
+        file_path = tmp_path / "small.h5"
+        data_format = Dataset.TIME_PERIOD_ARRAYS
+        time_period = 2022
+
+    SmallDataset().save_dataset(
+        {
+            "person_id": {2022: np.array([1, 2, 3])},
+            "benunit_id": {2022: np.array([1, 2])},
+            "household_id": {2022: np.array([1, 2])},
+            "state_id": {2022: np.array([1])},
+            "person_benunit_id": {2022: np.array([1, 1, 2])},
+            "person_household_id": {2022: np.array([1, 1, 2])},
+            "person_state_id": {2022: np.ones(3, dtype=int)},
+            "household_weight": {
+                2022: np.array([1.0, 2.0]),
+                2023: np.array([1.5, 2.5]),
+            },
+            "age": {2022: np.array([30, 30, 70])},
+            "employment_income": {2022: np.array([20_000, 60_000, 0])},
+            "savings": {2022: np.array([1_000.0, 0.0])},
+        }
+    )
+    full = Microsimulation(dataset=SmallDataset)
+    projected = Microsimulation(
+        dataset=SmallDataset,
+        target_variables=["income_tax"],
+        target_period=2022,
+    )
+    assert not projected.get_holder("savings").get_known_periods()
+    assert [
+        str(known_period)
+        for known_period in projected.get_holder(
+            "household_weight"
+        ).get_known_periods()
+    ] == ["2022"]
+    assert np.allclose(
+        projected.calculate("income_tax", 2022).values,
+        full.calculate("income_tax", 2022).values,
+    )
+
+
+def test_structural_reforms_are_projected(tmp_path):
+    class SmallDataset(UKDataset):
+        name = "small"
+        label = "Small"
+        file_path = tmp_path / "small.h5"
+        data_format = Dataset.TIME_PERIOD_ARRAYS
+        time_period = 2022
+
+    SmallDataset().save_dataset(
+        {
+            "person_id": {2022: np.array([1, 2, 3])},
+            "benunit_id": {2022: np.array([1])},
+            "household_id": {2022: np.array([1])},
+            "state_id": {2022: np.array([1])},
+            "person_benunit_id": {2022: np.array([1, 1, 1])},
+            "person_household_id": {2022: np.array([1, 1, 1])},
+            "person_state_id": {2022: np.ones(3, dtype=int)},
+            "household_weight": {2022: np.array([1.0])},
+            "age": {2022: np.array([40, 40, 5])},
+        }
+    )
+    marriage_neutral_it = (
+        "gov.contrib.cps.marriage_tax_reforms.marriage_neutral_it"
+    )
+    reform = Reform.from_dict(
+        {
+            f"{marriage_neutral_it}.neutralise_income_tax": {
+                "2020-01-01.2030-01-01": True
+            },
+            f"{marriage_neutral_it}.max_child_age": {
+                "2020-01-01.2030-01-01": 18
+            },
+        },
+        country_id="uk",
+    )
+    # The condition only exists in the structurally reformed system.
+    simulation = Microsimulation(
+        dataset=SmallDataset,
+        reform=reform,
+        target_variables=["meets_ma_neutral_tax_conditions"],
+    )
+    assert simulation.get_holder("age").get_known_periods()
+    assert simulation.calculate(
+        "meets_ma_neutral_tax_conditions", 2022
+    ).values.all()
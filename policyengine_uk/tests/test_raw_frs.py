@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+from policyengine_uk.data.datasets.frs.raw_frs import RawFRS
+
+
+def test_regenerating_replaces_the_store(tmp_path):
+    tab_folder = tmp_path / "tab"
+    tab_folder.mkdir()
+    tables = {
+        "adult": "SERNUM\tBENUNIT\tPERSON\n1\t1\t1\n",
+        "benunit": "SERNUM\tBENUNIT\n1\t1\n",
+        "househol": "SERNUM\n1\n",
+        "pension": "SERNUM\tBENUNIT\tPERSON\n1\t1\t1\n",
+    }
+    for name, contents in tables.items():
+        (tab_folder / f"{name}.tab").write_text(contents)
+
+    class SmallRawFRS(RawFRS):
+        name = "small_raw_frs"
+        label = "Small raw FRS"
+        file_path = tmp_path / "small_raw_frs.h5"
+        time_period = 2022
+
+    SmallRawFRS.tab_folder = tab_folder
+    SmallRawFRS().generate()
+    with pd.HDFStore(SmallRawFRS.file_path, "r") as store:
+        assert "/pension" in store.keys()
+
+    (tab_folder / "pension.tab").unlink()
+    SmallRawFRS().generate()
+    with pd.HDFStore(SmallRawFRS.file_path, "r") as store:
+        assert sorted(store.keys()) == ["/adult", "/benunit", "/househol"]
+
+    # A failed build leaves the previous store in place.
+    (tab_folder / "adult.tab").unlink()
+    with pytest.raises(KeyError):
+        SmallRawFRS().generate()
+    with pd.HDFStore(SmallRawFRS.file_path, "r") as store:
+        assert sorted(store.keys()) == ["/adult", "/benunit", "/househol"]
+    assert list(tmp_path.glob("*.h5")) == [SmallRawFRS.file_path]
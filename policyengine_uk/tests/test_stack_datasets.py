@@ -0,0 +1,20 @@
+import numpy as np
+from policyengine_uk.tools.stack_datasets import stack_datasets
+
+
+def test_stacking_offsets_ids_once_per_dataset():
+    data = {
+        "household_id": {2021: np.array([1, 2, 3])},
+        "household_weight": {2021: np.array([1.0, 2.0, 3.0])},
+    }
+    stacked = stack_datasets([data] * 3)
+    assert np.array_equal(
+        stacked["household_id"][2021], [1, 2, 3, 4, 5, 6, 7, 8, 9]
+    )
+    assert np.array_equal(
+        stacked["household_weight"][2021], [1.0, 2.0, 3.0] * 3
+    )
+    pairwise = stack_datasets(stack_datasets(data, data), data)
+    assert np.array_equal(
+        pairwise["household_id"][2021], stacked["household_id"][2021]
+    )
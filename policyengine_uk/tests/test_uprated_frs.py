@@ -0,0 +1,41 @@
+import numpy as np
+from policyengine_core.data import Dataset
+from policyengine_core.periods import period
+from policyengine_uk.data.datasets.dataset import UKDataset
+from policyengine_uk.data.datasets.frs.uprated_frs import (
+    UpratedFRS,
+    get_uprating_factor,
+)
+from policyengine_uk.system import system
+
+
+def test_only_variables_with_uprating_indices_grow(tmp_path):
+    class InputDataset(UKDataset):
+        name = "input"
+        label = "Input"
+        file_path = tmp_path / "input.h5"
+        data_format = Dataset.ARRAYS
+        time_period = 2022
+
+    class Uprated(UpratedFRS.from_dataset(InputDataset, 2024)):
+        file_path = tmp_path / "uprated.h5"
+
+    InputDataset().save_dataset(
+        dict(
+            household_id=np.array([1, 2]),
+            rent=np.array([1_000.0, 2_000.0]),
+            age=np.array([30, 40]),
+        )
+    )
+    Uprated().generate()
+    data = Uprated().load_dataset()
+    factor = get_uprating_factor(
+        system.parameters,
+        "gov.indices.private_rent_index",
+        period(2022).start,
+        period(2024).start,
+    )
+    assert factor > 1
+    assert np.allclose(data["rent"], np.array([1_000.0, 2_000.0]) * factor)
+    assert np.array_equal(data["age"], [30, 40])
+    assert np.array_equal(data["household_id"], [1, 2])
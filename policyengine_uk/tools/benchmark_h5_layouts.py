@@ -0,0 +1,100 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Dict
+import h5py
+import numpy as np
+import pandas as pd
+from policyengine_uk.data.datasets.dataset import (
+    H5Layout,
+    UKDataset,
+    hdf5plugin,
+)
+
+DEFAULT_LAYOUTS = {
+    "contiguous": H5Layout(),
+    "gzip-1": H5Layout(compression="gzip", compression_level=1),
+    "gzip-4-shuffle": H5Layout(
+        compression="gzip", compression_level=4, shuffle=True
+    ),
+    "lzf-shuffle": H5Layout(compression="lzf", shuffle=True),
+    "lz4-shuffle": H5Layout(compression="lz4", shuffle=True),
+    "blosc-shuffle": H5Layout(compression="blosc", shuffle=True),
+}
+
+
+def _read_all(file_path: Path) -> int:
+    """Reads every array in an H5 file, returning the number of bytes."""
+    arrays = []
+    with h5py.File(file_path, "r") as f:
+        f.visititems(
+            lambda name, item: (
+                arrays.append(item[...])
+                if isinstance(item, h5py.Dataset)
+                else None
+            )
+        )
+    return sum(array.nbytes for array in arrays)
+
+
+def benchmark_h5_layouts(
+    dataset: UKDataset,
+    layouts: Dict[str, H5Layout] = None,
+    repeats: int = 3,
+) -> pd.DataFrame:
+    """Writes a dataset with each of several H5 layouts, and compares file
+    sizes, write times and full-load throughput (the best of several reads,
+    so mostly from the page cache rather than disk).
+
+    Args:
+        dataset (UKDataset): The dataset (with arrays) to rewrite.
+        layouts (Dict[str, H5Layout], optional): The layouts, by name. Defaults to DEFAULT_LAYOUTS (skipping those needing hdf5plugin if it is not installed).
+        repeats (int, optional): The number of reads to time. Defaults to 3.
+
+    Returns:
+        pd.DataFrame: One row per layout.
+    """
+    if layouts is None:
+        layouts = {
+            name: layout
+            for name, layout in DEFAULT_LAYOUTS.items()
+            if hdf5plugin is not None
+            or layout.compression in (None, "gzip", "lzf")
+        }
+    data = dataset.load_dataset()
+    rows = []
+    with TemporaryDirectory() as folder:
+        for layout_name, layout in layouts.items():
+
+            class LayoutDataset(UKDataset):
+                name = f"{dataset.name}_{layout_name}"
+                label = f"{dataset.label} ({layout_name})"
+                file_path = Path(folder) / f"{layout_name}.h5"
+                data_format = dataset.data_format
+                h5_layout = layout
+
+            layout_dataset = LayoutDataset()
+            start = perf_counter()
+            layout_dataset.save_dataset(data)
+            write_time = perf_counter() - start
+            read_times = []
+            for _ in range(repeats):
+                start = perf_counter()
+                nbytes = _read_all(layout_dataset.file_path)
+                read_times.append(perf_counter() - start)
+            rows.append(
+                dict(
+                    layout=layout_name,
+                    file_size_mb=layout_dataset.file_path.stat().st_size / 1e6,
+                    write_seconds=write_time,
+                    load_seconds=min(read_times),
+                    load_mb_per_second=nbytes / 1e6 / min(read_times),
+                )
+            )
+    return pd.DataFrame(rows).set_index("layout")
+
+
+if __name__ == "__main__":
+    from policyengine_uk.data import EnhancedFRS
+
+    print(benchmark_h5_layouts(EnhancedFRS(require=True)))
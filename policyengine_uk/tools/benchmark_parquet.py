@@ -0,0 +1,86 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, Dict
+import pandas as pd
+from policyengine_uk.data.datasets.dataset import UKDataset
+from policyengine_uk.data.datasets.parquet import (
+    load_parquet_dataset,
+    save_parquet_dataset,
+)
+
+
+def _get_nbytes(data: Dict[str, Dict[str, object]]) -> int:
+    return sum(
+        array.nbytes
+        for time_periods in data.values()
+        for array in time_periods.values()
+    )
+
+
+def benchmark_parquet(
+    dataset: UKDataset,
+    household_filters=(("region", "==", "SCOTLAND"),),
+    repeats: int = 3,
+) -> pd.DataFrame:
+    """Compares loading a time-period-arrays dataset from its H5 file and
+    from a Parquet copy: file sizes, write times and full-load throughput
+    (the best of several reads, so mostly from the page cache rather than
+    disk), and the time to load only the households matching some filters.
+
+    Args:
+        dataset (UKDataset): The dataset to compare.
+        household_filters (optional): Filters on household variables for the filtered Parquet load. Defaults to Scottish households.
+        repeats (int, optional): The number of reads to time. Defaults to 3.
+
+    Returns:
+        pd.DataFrame: One row per format.
+    """
+    file_path = Path(dataset.file_path)
+    start = perf_counter()
+    data = dataset.load_dataset()
+    h5_load_time = perf_counter() - start
+    with TemporaryDirectory() as folder:
+        start = perf_counter()
+        save_parquet_dataset(data, folder)
+        write_time = perf_counter() - start
+        parquet_size = sum(
+            file.stat().st_size for file in Path(folder).glob("*.parquet")
+        )
+        loaders: Dict[str, Callable] = {
+            "h5": dataset.load_dataset,
+            "parquet": lambda: load_parquet_dataset(folder),
+            "parquet-filtered": lambda: load_parquet_dataset(
+                folder, household_filters=list(household_filters)
+            ),
+        }
+        rows = []
+        for format_name, loader in loaders.items():
+            load_times = [h5_load_time] if format_name == "h5" else []
+            for _ in range(repeats):
+                start = perf_counter()
+                loaded = loader()
+                load_times.append(perf_counter() - start)
+            rows.append(
+                dict(
+                    format=format_name,
+                    file_size_mb=(
+                        file_path.stat().st_size
+                        if format_name == "h5"
+                        else parquet_size
+                    )
+                    / 1e6,
+                    write_seconds=None if format_name == "h5" else write_time,
+                    load_seconds=min(load_times),
+                    load_mb_per_second=_get_nbytes(loaded)
+                    / 1e6
+                    / min(load_times),
+                )
+            )
+    return pd.DataFrame(rows).set_index("format")
+
+
+if __name__ == "__main__":
+    from policyengine_uk.data import EnhancedFRS
+
+    print(benchmark_parquet(EnhancedFRS(require=True)))
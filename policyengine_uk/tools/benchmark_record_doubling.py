@@ -0,0 +1,76 @@
+from time import perf_counter
+from typing import Dict, Mapping
+import numpy as np
+import pandas as pd
+from policyengine_uk.data.datasets.frs.spi_enhanced_frs import double_records
+
+
+def _double_records_with_lists(
+    arrays: Mapping[str, np.ndarray], imputations: pd.DataFrame = None
+) -> Dict[str, np.ndarray]:
+    """The previous implementation of `double_records`, via Python lists."""
+    doubled = {}
+    for variable in arrays:
+        if "_id" in variable:
+            marker = 10 ** np.ceil(max(np.log10(arrays[variable][...])))
+            doubled[variable] = list(arrays[variable][...] + marker) + list(
+                arrays[variable][...] + marker * 2
+            )
+        elif "_weight" in variable:
+            doubled[variable] = list(arrays[variable][...]) + list(
+                arrays[variable][...] * 0
+            )
+        else:
+            doubled[variable] = list(arrays[variable][...]) * 2
+    if imputations is not None:
+        for variable in imputations.columns:
+            if variable in doubled:
+                doubled[variable][len(doubled[variable]) // 2 :] = imputations[
+                    variable
+                ].values
+    return {variable: np.array(values) for variable, values in doubled.items()}
+
+
+def benchmark_record_doubling(
+    arrays: Mapping[str, np.ndarray],
+    imputations: pd.DataFrame = None,
+    repeats: int = 3,
+) -> pd.DataFrame:
+    """Times the record doubling stage of the SPI-enhanced FRS build with
+    NumPy arrays, against the previous Python list implementation, checking
+    that both give the same arrays.
+
+    Args:
+        arrays (Mapping[str, np.ndarray]): The variables to double.
+        imputations (pd.DataFrame, optional): Values for the copies. Defaults to None.
+        repeats (int, optional): The number of timed runs (the best is kept). Defaults to 3.
+
+    Returns:
+        pd.DataFrame: One row per implementation.
+    """
+    arrays = {variable: arrays[variable][...] for variable in arrays}
+    implementations = dict(
+        numpy=double_records,
+        lists=_double_records_with_lists,
+    )
+    results = {}
+    rows = []
+    for name, implementation in implementations.items():
+        times = []
+        for _ in range(repeats):
+            start = perf_counter()
+            results[name] = implementation(arrays, imputations)
+            times.append(perf_counter() - start)
+        rows.append(dict(implementation=name, seconds=min(times)))
+    for variable, values in results["numpy"].items():
+        assert np.array_equal(values, results["lists"][variable])
+    return pd.DataFrame(rows).set_index("implementation")
+
+
+if __name__ == "__main__":
+    from policyengine_uk.data.datasets.frs.stacked_frs import (
+        PooledFRS_2019_21,
+    )
+
+    with PooledFRS_2019_21(require=True).load() as frs:
+        print(benchmark_record_doubling(frs, repeats=1))
@@ -0,0 +1,145 @@
+from contextlib import contextmanager
+from typing import Dict, FrozenSet, Iterable, Iterator
+from weakref import WeakKeyDictionary
+from policyengine_core.simulations import Simulation
+from policyengine_core.taxbenefitsystems import TaxBenefitSystem
+
+# Neutralized clones, by base system and then by neutralized variable set.
+_NEUTRALIZED_SYSTEMS: Dict[
+    TaxBenefitSystem, Dict[FrozenSet[str], TaxBenefitSystem]
+] = WeakKeyDictionary()
+
+
+def get_neutralized_system(
+    tax_benefit_system: TaxBenefitSystem, variables: Iterable[str]
+) -> TaxBenefitSystem:
+    """Returns a clone of a tax-benefit system with the given variables
+    neutralized. The clone is built once per base system and variable set,
+    and reused by every later call.
+
+    Args:
+        tax_benefit_system (TaxBenefitSystem): The base system.
+        variables (Iterable[str]): The names of the variables to neutralize.
+
+    Returns:
+        TaxBenefitSystem: The (shared) neutralized system.
+    """
+    variables = frozenset(variables)
+    systems = _NEUTRALIZED_SYSTEMS.setdefault(tax_benefit_system, {})
+    if variables not in systems:
+        neutralized = tax_benefit_system.clone()
+        # The clone inherits a reference to the last simulation built on the
+        # base system, which would keep the base system (our cache key) alive.
+        neutralized.simulation = None
+        for variable in variables:
+            neutralized.neutralize_variable(variable)
+        systems[variables] = neutralized
+    return systems[variables]
+
+
+def get_neutralized_branch(
+    simulation: Simulation, name: str, variables: Iterable[str]
+) -> Simulation:
+    """Gets (creating if needed) a branch of a simulation which uses a cached
+    copy of the simulation's tax-benefit system with the given variables
+    neutralized, rather than cloning the system for every branch.
+
+    Args:
+        simulation (Simulation): The simulation to branch from.
+        name (str): The name of the branch.
+        variables (Iterable[str]): The names of the variables to neutralize.
+
+    Returns:
+        Simulation: The branch.
+    """
+    if name in simulation.branches:
+        return simulation.branches[name]
+    branch = simulation.get_branch(name)
+    branch.tax_benefit_system = get_neutralized_system(
+        simulation.tax_benefit_system, variables
+    )
+    return branch
+
+
+def drop_branch(simulation: Simulation, name: str) -> None:
+    """Removes a branch (and any branches of it) from a simulation, freeing
+    the arrays it holds.
+
+    Args:
+        simulation (Simulation): The simulation the branch was taken from.
+        name (str): The name of the branch.
+    """
+    branch = simulation.branches.pop(name, None)
+    if branch is None:
+        return
+    for sub_branch_name in list(branch.branches):
+        drop_branch(branch, sub_branch_name)
+    # Clones share disk storage with their parent, so only clear the
+    # branch's own in-memory arrays.
+    for population in branch.populations.values():
+        for holder in population._holders.values():
+            holder._memory_storage.delete()
+
+
+def clear_branch_calculations(
+    branch: Simulation, variables: Iterable[str] = None
+) -> None:
+    """Deletes the values set or calculated in a branch since it was created,
+    keeping those inherited from its parent simulation. This lets a branch be
+    reused for several alternative inputs while only recalculating the
+    variables downstream of them.
+
+    Args:
+        branch (Simulation): The branch.
+        variables (Iterable[str], optional): The variables to clear (e.g. those depending on the inputs to change). Defaults to all.
+    """
+    variables = None if variables is None else set(variables)
+    for population in branch.populations.values():
+        for variable, holder in population._holders.items():
+            if variables is not None and variable not in variables:
+                continue
+            for branch_name, period in holder.get_known_branch_periods():
+                if branch_name == branch.branch_name:
+                    holder.delete_arrays(period, branch_name)
+
+
+@contextmanager
+def temporary_branch(
+    simulation: Simulation, name: str = "branch", clone_system: bool = False
+) -> Iterator[Simulation]:
+    """Context manager for a branch which is dropped on exit. Branches which
+    already existed on entry are left in place.
+
+    Args:
+        simulation (Simulation): The simulation to branch from.
+        name (str, optional): The name of the branch. Defaults to "branch".
+        clone_system (bool, optional): Whether to clone the tax-benefit system. Defaults to False.
+
+    Yields:
+        Simulation: The branch.
+    """
+    existed = name in simulation.branches
+    branch = simulation.get_branch(name, clone_system=clone_system)
+    try:
+        yield branch
+    finally:
+        if not existed:
+            drop_branch(simulation, name)
+
+
+def get_branch_memory_usage(simulation: Simulation) -> Dict[str, int]:
+    """Returns the number of bytes held in memory by each branch of a
+    simulation (including branches of branches).
+
+    Args:
+        simulation (Simulation): The simulation.
+
+    Returns:
+        Dict[str, int]: The bytes held, keyed by branch path (e.g. "baseline/baseline_lsr_measurement").
+    """
+    usage = {}
+    for name, branch in simulation.branches.items():
+        usage[name] = branch.get_memory_usage()["total_nb_bytes"]
+        for sub_name, sub_usage in get_branch_memory_usage(branch).items():
+            usage[f"{name}/{sub_name}"] = sub_usage
+    return usage
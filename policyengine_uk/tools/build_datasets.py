@@ -0,0 +1,253 @@
+import hashlib
+import inspect
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Type
+import h5py
+from policyengine_core.data import Dataset
+
+# The file attribute recording the key of the build that wrote a dataset.
+BUILD_KEY_ATTRIBUTE = "_build_key"
+# The package files defining the model, keying datasets built with it.
+PACKAGE_FOLDER = Path(__file__).parent.parent
+MODEL_FILES = ("system.py", "entities.py", "model_api.py")
+MODEL_FOLDERS = ("variables", "parameters", "reforms")
+
+
+def _get_input_datasets(dataset: Type[Dataset]) -> List[Type[Dataset]]:
+    if hasattr(dataset, "get_input_datasets"):
+        return dataset.get_input_datasets()
+    return []
+
+
+def get_build_graph(target: Type[Dataset]) -> Dict[str, Type[Dataset]]:
+    """Gets the datasets a dataset is built from, directly or indirectly.
+
+    Args:
+        target (Type[Dataset]): The dataset.
+
+    Returns:
+        Dict[str, Type[Dataset]]: The datasets (including the target) by name, with each after its inputs.
+    """
+    graph = {}
+
+    def visit(dataset: Type[Dataset]):
+        if dataset.name in graph:
+            if graph[dataset.name] is not dataset:
+                raise ValueError(f"Two datasets are named {dataset.name}.")
+            return
+        for input_dataset in _get_input_datasets(dataset):
+            visit(input_dataset)
+        graph[dataset.name] = dataset
+
+    visit(target)
+    return graph
+
+
+def find_dataset(name: str) -> Optional[Type[Dataset]]:
+    """Finds a dataset by name, among the published datasets and those they
+    are built from.
+
+    Args:
+        name (str): The dataset's name.
+
+    Returns:
+        Optional[Type[Dataset]]: The dataset, or None if there is none.
+    """
+    from policyengine_uk.data import DATASETS
+
+    for dataset in DATASETS:
+        graph = get_build_graph(dataset)
+        if name in graph:
+            return graph[name]
+    return None
+
+
+def _update_with_file(digest: "hashlib._Hash", file_path: Path, name: str):
+    """Adds a file's name and contents (or its absence) to a digest."""
+    digest.update(name.encode())
+    if not file_path.exists():
+        digest.update(b"missing")
+        return
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            digest.update(block)
+
+
+def get_model_key() -> str:
+    """Gets a key identifying the model: the contents of the files defining
+    its variables, parameters and structural reforms.
+
+    Returns:
+        str: The key.
+    """
+    files = [PACKAGE_FOLDER / name for name in MODEL_FILES]
+    for folder in MODEL_FOLDERS:
+        files += sorted(
+            file
+            for file in (PACKAGE_FOLDER / folder).rglob("*")
+            if file.suffix in (".py", ".yaml")
+        )
+    digest = hashlib.sha256()
+    for file in files:
+        _update_with_file(
+            digest, file, file.relative_to(PACKAGE_FOLDER).as_posix()
+        )
+    return digest.hexdigest()
+
+
+def get_build_key(
+    dataset: Type[Dataset], input_keys: Sequence[str], model_key: str = None
+) -> str:
+    """Gets a key identifying a dataset's build: the source of the modules
+    defining the dataset's classes, its class attributes (e.g. its time
+    period or weighting factors), the contents of the files it is read from
+    (its TAB files and `external_files`), the model if it `uses_model`, and
+    its inputs' build keys.
+
+    Args:
+        dataset (Type[Dataset]): The dataset.
+        input_keys (Sequence[str]): The build keys of its input datasets.
+        model_key (str, optional): The model's key, if already calculated. Defaults to `get_model_key()`, when needed.
+
+    Returns:
+        str: The key.
+    """
+    digest = hashlib.sha256()
+    for cls in dataset.__mro__:
+        if cls.__module__.startswith("policyengine_uk"):
+            digest.update(
+                inspect.getsource(sys.modules[cls.__module__]).encode()
+            )
+    inputs = _get_input_datasets(dataset)
+    for name in sorted(dir(dataset)):
+        value = getattr(dataset, name)
+        if (
+            name.startswith("_")
+            or callable(value)
+            or isinstance(value, property)
+            or (isinstance(value, (list, tuple)) and value == inputs)
+        ):
+            continue
+        digest.update(f"{name}={value!r}".encode())
+    tab_folder = getattr(dataset, "tab_folder", None)
+    if tab_folder is not None and Path(tab_folder).exists():
+        for file in sorted(Path(tab_folder).iterdir()):
+            _update_with_file(digest, file, file.name)
+    for file in getattr(dataset, "external_files", ()):
+        _update_with_file(digest, Path(file), Path(file).name)
+    if getattr(dataset, "uses_model", False):
+        digest.update((model_key or get_model_key()).encode())
+    for input_key in input_keys:
+        digest.update(input_key.encode())
+    return digest.hexdigest()
+
+
+def get_saved_build_key(dataset: Type[Dataset]) -> Optional[str]:
+    """Gets the build key saved in a dataset's file, if any.
+
+    Args:
+        dataset (Type[Dataset]): The dataset.
+
+    Returns:
+        Optional[str]: The key, or None if the dataset is missing or was not built by `build_datasets`.
+    """
+    file_path = Path(dataset.file_path)
+    if not file_path.exists():
+        return None
+    try:
+        with h5py.File(file_path, "r") as f:
+            return f.attrs.get(BUILD_KEY_ATTRIBUTE)
+    except OSError:
+        return None
+
+
+def _save_build_key(dataset: Type[Dataset], key: str):
+    with h5py.File(dataset.file_path, "a") as f:
+        f.attrs[BUILD_KEY_ATTRIBUTE] = key
+
+
+def _generate_dataset(name: str):
+    """Generates a dataset by name (in a worker process, where dataset
+    classes made by `from_dataset` cannot be sent)."""
+    find_dataset(name)().generate()
+
+
+def build_datasets(
+    target: Type[Dataset] = None,
+    parallel: bool = True,
+    max_workers: int = None,
+) -> List[str]:
+    """Builds a dataset and the datasets it is built from, skipping those
+    whose saved build key shows they were built from the same code,
+    attributes, files, model (for datasets built with simulations or
+    parameters) and inputs. Datasets whose inputs are ready are generated
+    concurrently, in separate processes (e.g. the FRS years pooled together).
+
+    Args:
+        target (Type[Dataset], optional): The dataset to build. Defaults to the Enhanced FRS.
+        parallel (bool, optional): Whether to generate datasets in worker processes (which requires them to be reachable from `DATASETS`), rather than one at a time in this process. Defaults to True.
+        max_workers (int, optional): The number of worker processes. Defaults to one per CPU.
+
+    Returns:
+        List[str]: The names of the datasets generated.
+    """
+    if target is None:
+        from policyengine_uk.data import EnhancedFRS
+
+        target = EnhancedFRS
+    graph = get_build_graph(target)
+    model_key = get_model_key()
+    keys = {}
+    for name, dataset in graph.items():
+        keys[name] = get_build_key(
+            dataset,
+            [keys[d.name] for d in _get_input_datasets(dataset)],
+            model_key,
+        )
+    stale = [
+        name
+        for name, dataset in graph.items()
+        if get_saved_build_key(dataset) != keys[name]
+    ]
+
+    if not parallel:
+        for name in stale:
+            graph[name]().generate()
+            _save_build_key(graph[name], keys[name])
+        return stale
+
+    for name in stale:
+        if find_dataset(name) is not graph[name]:
+            raise ValueError(
+                f"{name} is not reachable from DATASETS, so it cannot be "
+                "generated in a worker process. Use parallel=False."
+            )
+    waiting_for = {
+        name: {d.name for d in _get_input_datasets(graph[name])}.intersection(
+            stale
+        )
+        for name in stale
+    }
+    with ProcessPoolExecutor(max_workers) as executor:
+        running = {}
+        while waiting_for or running:
+            for name in [
+                name for name, inputs in waiting_for.items() if not inputs
+            ]:
+                del waiting_for[name]
+                running[executor.submit(_generate_dataset, name)] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                future.result()
+                _save_build_key(graph[name], keys[name])
+                for inputs in waiting_for.values():
+                    inputs.discard(name)
+    return stale
+
+
+if __name__ == "__main__":
+    for name in build_datasets():
+        print(f"Built {name}")
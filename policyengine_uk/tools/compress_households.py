@@ -0,0 +1,222 @@
+from typing import Dict, Tuple
+import numpy as np
+import pandas as pd
+from policyengine_core.taxbenefitsystems import TaxBenefitSystem
+
+VariableTimePeriodData = Dict[str, Dict[str, np.ndarray]]
+Hash = Tuple[np.ndarray, np.ndarray]
+
+# Entities whose records are merged along with their households (others,
+# like the state, are kept as they are).
+COMPRESSED_ENTITIES = ("household", "benunit", "person")
+# Households are identified by two 64-bit hash lanes, making accidental
+# collisions between different households vanishingly unlikely.
+_SECOND_LANE_SALT = np.uint64(0x9E3779B97F4A7C15)
+_MULTIPLIER = np.uint64(1_000_003)
+
+
+class HouseholdCompression:
+    """Maps each household, benefit unit and person of a dataset to its
+    record in the compressed dataset, so that results calculated on the
+    compressed dataset can be expanded back to the original records.
+
+    Args:
+        maps (Dict[str, np.ndarray]): For each entity, the compressed index of each original record.
+    """
+
+    def __init__(self, maps: Dict[str, np.ndarray]):
+        self.maps = maps
+
+    def expand(self, values: np.ndarray, entity: str) -> np.ndarray:
+        """Expands values calculated on the compressed dataset to the
+        original dataset's records.
+
+        Args:
+            values (np.ndarray): The values, one per compressed record.
+            entity (str): The entity key (e.g. "person").
+
+        Returns:
+            np.ndarray: The values, one per original record.
+        """
+        if entity not in self.maps:
+            return values
+        return np.asarray(values)[self.maps[entity]]
+
+
+def _hash(values: np.ndarray) -> Hash:
+    """Hashes each element of an array into two 64-bit lanes."""
+    first = pd.util.hash_array(np.asarray(values), categorize=False)
+    return first, pd.util.hash_array(first ^ _SECOND_LANE_SALT)
+
+
+def _mix(hash: Hash, other: Hash) -> Hash:
+    """Mixes one hash into another, depending on the order of mixing."""
+    return tuple(
+        pd.util.hash_array(lane * _MULTIPLIER ^ other_lane)
+        for lane, other_lane in zip(hash, other)
+    )
+
+
+def _group_by_household(
+    household_index: np.ndarray, num_households: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Orders records by household, returning the order, the number of
+    records in each household, and each record's position in its household."""
+    order = np.argsort(household_index, kind="stable")
+    counts = np.bincount(household_index, minlength=num_households)
+    starts = np.cumsum(counts) - counts
+    position = np.empty_like(order)
+    position[order] = np.arange(len(order)) - starts[household_index[order]]
+    return order, counts, position
+
+
+def _sum_by_household(
+    hash: Hash, order: np.ndarray, counts: np.ndarray
+) -> Hash:
+    """Sums records' hashes within each household (wrapping on overflow)."""
+    has_records = counts > 0
+    starts = (np.cumsum(counts) - counts)[has_records]
+    sums = []
+    for lane in hash:
+        lane_sums = np.zeros(len(counts), dtype=np.uint64)
+        if len(order) > 0:
+            lane_sums[has_records] = np.add.reduceat(lane[order], starts)
+        sums.append(lane_sums)
+    return tuple(sums)
+
+
+def compress_duplicate_households(
+    data: VariableTimePeriodData, system: TaxBenefitSystem
+) -> Tuple[VariableTimePeriodData, HouseholdCompression]:
+    """Merges households whose inputs are identical across every entity
+    (e.g. the copies made when replicating a dataset) into one household,
+    with their weights summed. Households are identified by hashing their
+    own inputs and those of their benefit units and people, along with each
+    member's position in the household (and each person's benefit unit).
+    IDs and weights are not compared.
+
+    Deterministic variables give the same weighted results on the
+    compressed dataset, while each distinct household is only calculated
+    once. Variables using `random` draw one number per compressed record,
+    so a merged household takes up (for example) a benefit or not as a
+    whole, rather than each of its copies drawing separately: expected
+    totals are unchanged, but the variation between copies is lost. Datasets
+    whose copies exist to vary random outcomes should not be compressed.
+
+    Args:
+        data (VariableTimePeriodData): The dataset.
+        system (TaxBenefitSystem): The tax-benefit system, defining each variable's entity.
+
+    Returns:
+        Tuple[VariableTimePeriodData, HouseholdCompression]: The compressed dataset, and the map from original to compressed records.
+    """
+
+    def eternity(variable):
+        values = data[variable]
+        return values[list(values)[0]]
+
+    entity_of = {
+        variable: system.variables[variable].entity.key
+        for variable in data
+        if variable in system.variables
+    }
+    num_households = len(eternity("household_id"))
+    person_household = pd.Index(eternity("household_id")).get_indexer(
+        eternity("person_household_id")
+    )
+    person_benunit = pd.Index(eternity("benunit_id")).get_indexer(
+        eternity("person_benunit_id")
+    )
+    benunit_household = np.empty(len(eternity("benunit_id")), dtype=int)
+    benunit_household[person_benunit] = person_household
+    household_index = dict(
+        household=np.arange(num_households),
+        benunit=benunit_household,
+        person=person_household,
+    )
+    grouping = {
+        entity: _group_by_household(household_index[entity], num_households)
+        for entity in COMPRESSED_ENTITIES
+    }
+    position = {entity: grouping[entity][2] for entity in grouping}
+
+    # Hash each record's inputs (excluding IDs and weights), after its
+    # position in its household (and, for people, their benefit unit's).
+    structure = dict(
+        household=[],
+        benunit=[position["benunit"]],
+        person=[position["person"], position["benunit"][person_benunit]],
+    )
+    household_hash = None
+    for entity in COMPRESSED_ENTITIES:
+        size = len(household_index[entity])
+        hash = (np.zeros(size, dtype=np.uint64),) * 2
+        for values in structure[entity]:
+            hash = _mix(hash, _hash(values))
+        for variable in sorted(data):
+            if (
+                entity_of.get(variable) != entity
+                or variable.endswith("_id")
+                or "_weight" in variable
+            ):
+                continue
+            for time_period in sorted(data[variable], key=str):
+                hash = _mix(hash, _hash(data[variable][time_period]))
+        if entity == "household":
+            household_hash = hash
+        else:
+            # Members' hashes already depend on their positions, so their
+            # (order-independent) sum still distinguishes orderings.
+            order, counts, _ = grouping[entity]
+            household_hash = _mix(
+                household_hash, _sum_by_household(hash, order, counts)
+            )
+
+    # Keep the first household of each group of duplicates.
+    _, first, group = np.unique(
+        np.stack(household_hash, axis=1),
+        axis=0,
+        return_index=True,
+        return_inverse=True,
+    )
+    group = group.ravel()
+    kept_households = np.sort(first)
+    # Number groups in order of their first household.
+    group_rank = np.empty(len(first), dtype=int)
+    group_rank[np.argsort(first)] = np.arange(len(first))
+    maps = dict(household=group_rank[group])
+    kept = dict(household=np.zeros(num_households, dtype=bool))
+    kept["household"][kept_households] = True
+    for entity in ("benunit", "person"):
+        # Members map to the member in the same position of the household
+        # kept for their group.
+        kept[entity] = kept["household"][household_index[entity]]
+        max_members = (
+            position[entity].max() + 1 if len(position[entity]) else 1
+        )
+        key = maps["household"][household_index[entity]] * max_members + (
+            position[entity]
+        )
+        kept_keys = key[kept[entity]]
+        order = np.argsort(kept_keys)
+        maps[entity] = order[np.searchsorted(kept_keys[order], key)]
+
+    compressed = {}
+    for variable, values in data.items():
+        entity = entity_of.get(variable)
+        if entity not in COMPRESSED_ENTITIES:
+            compressed[variable] = values
+            continue
+        compressed[variable] = {}
+        for time_period, array in values.items():
+            if "_weight" in variable:
+                compressed[variable][time_period] = np.bincount(
+                    maps[entity],
+                    weights=array,
+                    minlength=kept[entity].sum(),
+                ).astype(np.asarray(array).dtype)
+            else:
+                compressed[variable][time_period] = np.asarray(array)[
+                    kept[entity]
+                ]
+    return compressed, HouseholdCompression(maps)
@@ -1,45 +1,83 @@
-from policyengine_core.data import Dataset
-from policyengine_uk import Microsimulation
+import os
+from pathlib import Path
+from typing import Dict, Type, Union
+import h5py
 import numpy as np
+from policyengine_core.data import Dataset
+from policyengine_core.taxbenefitsystems import TaxBenefitSystem
+from policyengine_uk.data.datasets.dataset import H5Layout
 
 
-def drop_zero_weight_households(dataset):
-    sim = Microsimulation(dataset=dataset)
-    assert sim.dataset.data_format == Dataset.TIME_PERIOD_ARRAYS
+def _eternity(file: h5py.File, variable: str) -> np.ndarray:
+    """Reads the first stored time period of a variable."""
+    return file[variable][list(file[variable].keys())[0]][...]
 
-    is_zero_weight_all_years = np.ones_like(
-        sim.calculate("household_weight").values
-    )
 
-    for year in range(2021, 2028):
-        is_zero_weight_all_years = is_zero_weight_all_years * (
-            sim.calculate("household_weight", period=year).values == 0
-        )
+def get_zero_weight_masks(file: h5py.File) -> Dict[str, np.ndarray]:
+    """Finds the records of households with zero weight in every stored
+    time period, from the weights and IDs in a time-period-arrays H5 file.
 
-    hh_zero_weight = is_zero_weight_all_years
-    person_zero_weight = sim.map_result(
-        is_zero_weight_all_years, "household", "person"
+    Args:
+        file (h5py.File): The dataset file.
+
+    Returns:
+        Dict[str, np.ndarray]: For each household-level entity, whether each record should be kept.
+    """
+    keep_household = np.zeros(len(_eternity(file, "household_id")), dtype=bool)
+    for time_period in file["household_weight"]:
+        keep_household |= file["household_weight"][time_period][...] != 0
+    keep_person = np.isin(
+        _eternity(file, "person_household_id"),
+        _eternity(file, "household_id")[keep_household],
+    )
+    keep_benunit = np.isin(
+        _eternity(file, "benunit_id"),
+        _eternity(file, "person_benunit_id")[keep_person],
     )
-    benunit_zero_weight = sim.map_result(
-        is_zero_weight_all_years, "household", "benunit"
+    return dict(
+        household=keep_household,
+        benunit=keep_benunit,
+        person=keep_person,
     )
 
-    entity_to_remove = {
-        "person": person_zero_weight > 0,
-        "benunit": benunit_zero_weight > 0,
-        "household": hh_zero_weight > 0,
-    }
 
-    data = sim.dataset.load_dataset()
-    for variable in data:
-        entity = sim.tax_benefit_system.variables[variable].entity.key
-        for time_period in data[variable]:
-            if entity in entity_to_remove:
-                data[variable][time_period] = data[variable][time_period][
-                    ~entity_to_remove[entity]
-                ]
+def drop_zero_weight_households(
+    dataset: Union[str, Type[Dataset], Dataset],
+    system: TaxBenefitSystem = None,
+):
+    """Removes households with zero weight in every time period (and their
+    benefit units and people) from a time-period-arrays dataset, in place.
+    Variables are filtered one at a time into a new file, which then
+    replaces the dataset's file.
 
-    sim.dataset.save_dataset(data)
+    Args:
+        dataset (Union[str, Type[Dataset], Dataset]): The dataset, or its name.
+        system (TaxBenefitSystem, optional): The tax-benefit system, defining each variable's entity. Defaults to the UK system.
+    """
+    if system is None:
+        from policyengine_uk.system import system
+    if isinstance(dataset, str):
+        from policyengine_uk.data import DATASETS
 
+        dataset = {d.name: d for d in DATASETS}[dataset]
+    if isinstance(dataset, type):
+        dataset = dataset(require=True)
+    assert dataset.data_format == Dataset.TIME_PERIOD_ARRAYS
+    layout = getattr(dataset, "h5_layout", None) or H5Layout()
 
-drop_zero_weight_households("enhanced_frs")
+    file_path = Path(dataset.file_path)
+    filtered_path = file_path.with_name(f"{file_path.stem}_filtered.h5")
+    with h5py.File(file_path, "r") as source, h5py.File(
+        filtered_path, "w"
+    ) as target:
+        keep = get_zero_weight_masks(source)
+        for variable in dataset.variables:
+            entity = system.variables[variable].entity.key
+            for time_period in source[variable]:
+                values = source[variable][time_period][...]
+                if entity in keep:
+                    values = values[keep[entity]]
+                layout.create_dataset(
+                    target, f"{variable}/{time_period}", values
+                )
+    os.replace(filtered_path, file_path)
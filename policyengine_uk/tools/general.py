@@ -1,9 +1,70 @@
-from typing import Any, Callable
+from typing import Any, Callable, Type
+from numpy.typing import ArrayLike
+from weakref import WeakKeyDictionary
 from policyengine_core.model_api import *
 from policyengine_uk.entities import *
 import numpy as np
 from datetime import datetime
 from pathlib import Path
 from policyengine_core.model_api import *
+from policyengine_core.parameters import ParameterNodeAtInstant
 
 DATA_FOLDER = Path(__file__).parent.parent / "data"
+
+# Compiled enum-keyed parameter arrays, by parameter node and then by enum.
+_ENUM_PARAMETER_ARRAYS = WeakKeyDictionary()
+
+
+def enum_parameter_array(
+    node: ParameterNodeAtInstant,
+    possible_values: Type[Enum],
+    default: float = np.nan,
+) -> np.ndarray:
+    """Compiles a parameter node keyed by enum names into an array aligned
+    with the enum's integer codes, so that it can be indexed directly by an
+    enum array (rather than decoding it to strings).
+
+    Args:
+        node (ParameterNodeAtInstant): The parameter node at an instant.
+        possible_values (Type[Enum]): The enum keying the node.
+        default (float, optional): The value for enum items missing from the node. Defaults to NaN.
+
+    Returns:
+        np.ndarray: The parameter values, indexed by enum code.
+    """
+    arrays = _ENUM_PARAMETER_ARRAYS.setdefault(node, {})
+    key = possible_values, default
+    if key not in arrays:
+        keys = set(node)
+        arrays[key] = np.array(
+            [
+                node[item.name] if item.name in keys else default
+                for item in possible_values
+            ],
+            dtype=float,
+        )
+    return arrays[key]
+
+
+def evaluate_on_subset(
+    mask: ArrayLike, function: Callable, *arrays: ArrayLike
+) -> np.ndarray:
+    """Evaluates a vectorised function of some arrays only at the elements
+    selected by a mask (e.g. the households in a tax's jurisdiction), and
+    scatters the results back, with zero elsewhere.
+
+    Args:
+        mask (ArrayLike): Whether to evaluate the function at each element.
+        function (Callable): The function, taking and returning arrays.
+        *arrays (ArrayLike): The arguments to the function.
+
+    Returns:
+        np.ndarray: The function's results, or zero where not selected.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    if mask.all():
+        return function(*arrays)
+    result = np.zeros(mask.shape)
+    if mask.any():
+        result[mask] = function(*(np.asarray(array)[mask] for array in arrays))
+    return result
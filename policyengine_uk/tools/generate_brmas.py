@@ -1,42 +1,150 @@
-from policyengine_uk.data.gov import lha_list_of_rents, brma_to_region
+from functools import lru_cache
+from typing import Tuple
+from policyengine_core.enums import EnumArray
 import numpy as np
 import pandas as pd
-from policyengine_uk.variables.household.demographic.locations import BRMAName
-from policyengine_uk import Microsimulation
+from numpy.typing import ArrayLike
 
-sim = Microsimulation()
-region = sim.populations["benunit"].household("region", 2023).decode_to_str()
-lha_category = sim.calculate("LHA_category")
+DEFAULT_BRMA = "MAIDSTONE"
 
-brma = np.empty(len(region), dtype=object)
 
-# Sample from a random BRMA in the region, weighted by the number of observations in each BRMA
-lha_list_of_rents = lha_list_of_rents.copy()
+@lru_cache(maxsize=None)
+def _get_rent_groups() -> (
+    Tuple[pd.Index, pd.Index, np.ndarray, np.ndarray, np.ndarray]
+):
+    """Groups the List of Rents observations by region and LHA category.
 
-for possible_region in lha_list_of_rents.region.unique():
-    for possible_lha_category in lha_list_of_rents.lha_category.unique():
-        lor_mask = (lha_list_of_rents.region == possible_region) & (
-            lha_list_of_rents.lha_category == possible_lha_category
-        )
-        mask = (region == possible_region) & (
-            lha_category == possible_lha_category
-        )
-        brma[mask] = lha_list_of_rents[lor_mask].brma.sample(
-            n=len(region[mask]), replace=True
+    Returns:
+        Tuple[pd.Index, pd.Index, np.ndarray, np.ndarray, np.ndarray]: The regions, the categories, the BRMA names (with the default BRMA last), the BRMA code of each observation (contiguous by (region, category) group) and the number of observations in each group (with a final, empty group).
+    """
+    from policyengine_uk.data.gov import lha_list_of_rents
+
+    rent_region, regions = pd.factorize(lha_list_of_rents.region.values)
+    rent_category, categories = pd.factorize(
+        lha_list_of_rents.lha_category.values
+    )
+    rent_brma, brmas = pd.factorize(lha_list_of_rents.brma.values)
+    rent_group = rent_region * len(categories) + rent_category
+    return (
+        pd.Index(regions),
+        pd.Index(categories),
+        np.append(brmas.astype(object), DEFAULT_BRMA),
+        rent_brma[np.argsort(rent_group, kind="stable")],
+        np.bincount(rent_group, minlength=len(regions) * len(categories) + 1),
+    )
+
+
+def _encode(values: ArrayLike, names: pd.Index) -> np.ndarray:
+    """Gets the position of each value in a list of names (-1 if absent),
+    looking up each distinct value only once.
+
+    Args:
+        values (ArrayLike): The values, as names or an enum array.
+        names (pd.Index): The names.
+
+    Returns:
+        np.ndarray: The positions.
+    """
+    if isinstance(values, EnumArray):
+        distinct = [item.name for item in values.possible_values]
+        codes = np.asarray(values)
+    else:
+        codes, distinct = pd.factorize(np.asarray(values))
+    return names.get_indexer(distinct)[codes]
+
+
+def sample_brmas(
+    region: ArrayLike,
+    lha_category: ArrayLike,
+    benunit_household_id: ArrayLike,
+    household_id: ArrayLike,
+    seed: int = 0,
+) -> np.ndarray:
+    """Samples a BRMA for each household. Each benefit unit draws a List of
+    Rents observation at random from those in its region and LHA category
+    (so BRMAs are weighted by their number of observations), and each
+    household takes the BRMA of one of its benefit units at random. Draws use
+    a counter-based generator, so results are reproducible for a given seed.
+
+    Args:
+        region (ArrayLike): The region of each benefit unit (names or an enum array).
+        lha_category (ArrayLike): The LHA category of each benefit unit (names or an enum array).
+        benunit_household_id (ArrayLike): The household ID of each benefit unit.
+        household_id (ArrayLike): The household IDs to return BRMAs for, in order.
+        seed (int, optional): The random seed. Defaults to 0.
+
+    Returns:
+        np.ndarray: The BRMA name of each household. Households with no List of Rents observations for their region and category get the default BRMA.
+    """
+    rng = np.random.Generator(np.random.Philox(seed))
+    (
+        regions,
+        categories,
+        brmas,
+        group_brmas,
+        group_sizes,
+    ) = _get_rent_groups()
+    group_starts = np.cumsum(group_sizes) - group_sizes
+    region_code = _encode(region, regions)
+    category_code = _encode(lha_category, categories)
+    # Unknown regions and categories fall into the final, empty group.
+    group = np.where(
+        (region_code >= 0) & (category_code >= 0),
+        region_code * len(categories) + category_code,
+        len(group_sizes) - 1,
+    )
+    observation = group_starts[group] + (
+        rng.random(len(group)) * group_sizes[group]
+    ).astype(int)
+    benunit_brma = np.where(
+        group_sizes[group] > 0,
+        group_brmas[np.minimum(observation, len(group_brmas) - 1)],
+        len(brmas) - 1,
+    )
+
+    # Each household takes the BRMA of one of its benefit units at random.
+    benunit_household, households = pd.factorize(
+        np.asarray(benunit_household_id)
+    )
+    household_sizes = np.bincount(benunit_household)
+    household_starts = np.cumsum(household_sizes) - household_sizes
+    chosen = household_starts + (
+        rng.random(len(households)) * household_sizes
+    ).astype(int)
+    household_brma = benunit_brma[
+        np.argsort(benunit_household, kind="stable")[chosen]
+    ]
+    household_index = pd.Index(households).get_indexer(
+        np.asarray(household_id)
+    )
+    return brmas[
+        np.where(
+            household_index >= 0,
+            household_brma[household_index],
+            len(brmas) - 1,
         )
+    ]
+
 
-# Convert benunit-level BRMAs to household-level BRMAs (pick a random one)
+def generate_brmas(seed: int = 0):
+    """
+    Generate BRMAs for the Enhanced FRS and save them to enhanced_frs_brmas.csv.gz.
+    """
+    from policyengine_uk import Microsimulation
 
-df = pd.DataFrame(
-    {
-        "brma": brma,
-        "household_id": sim.populations["benunit"].household(
-            "household_id", 2023
-        ),
-    }
-)
+    sim = Microsimulation()
+    benunit = sim.populations["benunit"]
+    brmas = sample_brmas(
+        region=benunit.household("region", 2023),
+        lha_category=benunit("LHA_category", 2023),
+        benunit_household_id=benunit.household("household_id", 2023),
+        household_id=sim.calculate("household_id", 2023).values,
+        seed=seed,
+    )
+    pd.DataFrame({"brma": brmas}).to_csv(
+        "enhanced_frs_brmas.csv.gz", index=False, compression="gzip"
+    )
 
-df = df.groupby("household_id").brma.aggregate(lambda x: x.sample(n=1).iloc[0])
-brmas = df[sim.calculate("household_id")].values
 
-df.to_csv("enhanced_frs_brmas.csv.gz", index=False, compression="gzip")
+if __name__ == "__main__":
+    generate_brmas()
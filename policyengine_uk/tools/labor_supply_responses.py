@@ -0,0 +1,187 @@
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Tuple
+import numpy as np
+from numpy.typing import ArrayLike
+from policyengine_core import periods
+from policyengine_core.periods import Period
+from policyengine_core.simulations import Simulation
+from policyengine_uk.tools.branches import (
+    drop_branch,
+    get_neutralized_branch,
+    temporary_branch,
+)
+
+LSR_VARIABLE = "employment_income_behavioral_response"
+
+
+@contextmanager
+def lsr_measurement_branches(
+    simulation: Simulation, period: Period
+) -> Iterator[Tuple[Simulation, Simulation]]:
+    """Context manager for the reform and baseline branches (without labour
+    supply responses) used to measure income and wage changes, with
+    pre-response employment income set for the given period. The branches
+    are dropped on exit.
+
+    Args:
+        simulation (Simulation): The reform simulation.
+        period (Period): The period to measure.
+
+    Yields:
+        Tuple[Simulation, Simulation]: The reform and baseline measurement branches.
+    """
+    measurement_branch = get_neutralized_branch(
+        simulation, "lsr_measurement", [LSR_VARIABLE]
+    )  # A branch without LSRs
+    baseline_branch = get_neutralized_branch(
+        simulation.get_branch("baseline"),
+        "baseline_lsr_measurement",
+        [LSR_VARIABLE],
+    )  # Already created by default
+
+    # (system with LSRs) <- (system without LSRs used to calculate LSRs)
+    #                      |
+    #                      * -(baseline system without LSRs used to calculate LSRs)
+
+    # The neutralized systems are cached per base system, so they are
+    # shared across periods and simulations rather than cloned each time.
+
+    person = simulation.populations["person"]
+    employment_income = person("employment_income_before_lsr", period)
+    for branch in [measurement_branch, baseline_branch]:
+        branch.set_input(
+            "employment_income_before_lsr", period, employment_income
+        )
+    try:
+        yield measurement_branch, baseline_branch
+    finally:
+        drop_branch(simulation, "lsr_measurement")
+        drop_branch(
+            simulation.get_branch("baseline"), "baseline_lsr_measurement"
+        )
+
+
+def _get_bounds(simulation: Simulation, period: Period):
+    return simulation.tax_benefit_system.get_parameters_at_instant(
+        period.start
+    ).gov.simulation.labor_supply_responses.bounds
+
+
+def get_relative_income_change(
+    measurement_branch: Simulation, baseline_branch: Simulation, period: Period
+) -> ArrayLike:
+    """Calculates each person's relative change in household net income
+    under the reform, before labour supply responses.
+
+    Args:
+        measurement_branch (Simulation): The reform branch without labour supply responses.
+        baseline_branch (Simulation): The baseline branch without labour supply responses.
+        period (Period): The period to measure.
+
+    Returns:
+        ArrayLike: The relative income changes, clipped to their bounds.
+    """
+    baseline_net_income = baseline_branch.populations["person"].household(
+        "household_net_income", period
+    )
+    net_income = measurement_branch.populations["person"].household(
+        "household_net_income", period
+    )
+    income_change_bound = _get_bounds(measurement_branch, period).income_change
+    # _c suffix for "clipped"
+    baseline_net_income_c = np.clip(baseline_net_income, 1, None)
+    net_income_c = np.clip(net_income, 1, None)
+    relative_change = (
+        net_income_c - baseline_net_income_c
+    ) / baseline_net_income_c
+    return np.clip(relative_change, -income_change_bound, income_change_bound)
+
+
+def get_relative_wage_change(
+    measurement_branch: Simulation, baseline_branch: Simulation, period: Period
+) -> ArrayLike:
+    """Calculates each person's relative change in effective wage rate (one
+    minus their marginal tax rate) under the reform, before labour supply
+    responses.
+
+    Args:
+        measurement_branch (Simulation): The reform branch without labour supply responses.
+        baseline_branch (Simulation): The baseline branch without labour supply responses.
+        period (Period): The period to measure.
+
+    Returns:
+        ArrayLike: The relative wage changes, clipped to their bounds.
+    """
+    baseline_mtr = baseline_branch.populations["person"](
+        "marginal_tax_rate", period
+    )
+    baseline_wage = 1 - baseline_mtr
+    mtr = measurement_branch.populations["person"]("marginal_tax_rate", period)
+    wage_rate = 1 - mtr
+    # _c suffix for "clipped"
+    baseline_wage_c = np.where(baseline_wage == 0, 0.01, baseline_wage)
+    wage_rate_c = np.where(wage_rate == 0, 0.01, wage_rate)
+    relative_change = (wage_rate_c - baseline_wage_c) / baseline_wage_c
+    wage_change_bound = _get_bounds(
+        measurement_branch, period
+    ).effective_wage_rate_change
+    return np.clip(relative_change, -wage_change_bound, wage_change_bound)
+
+
+def calculate_lsr_scenarios(
+    simulation: Simulation,
+    elasticities: Iterable[Tuple[float, float]],
+    period: Period = None,
+    variables: Iterable[str] = ("household_net_income",),
+) -> Dict[Tuple[float, float], Dict[str, ArrayLike]]:
+    """Calculates labour supply responses to a reform under several
+    (income elasticity, substitution elasticity) pairs. The measurement
+    branches are only run once: the responses are linear in the elasticities
+    given the relative income and wage changes, so each scenario only
+    recalculates the variables downstream of employment income.
+
+    Args:
+        simulation (Simulation): The reform simulation.
+        elasticities (Iterable[Tuple[float, float]]): The (income, substitution) elasticity pairs.
+        period (Period, optional): The period to calculate. Defaults to the simulation's default calculation period.
+        variables (Iterable[str], optional): The downstream variables to calculate under each scenario. Defaults to household net income.
+
+    Returns:
+        Dict[Tuple[float, float], Dict[str, ArrayLike]]: For each elasticity pair, the employment income responses and requested variables.
+    """
+    if simulation.baseline is None:
+        raise ValueError(
+            "Labour supply response scenarios require a reform simulation."
+        )
+    period = periods.period(period or simulation.default_calculation_period)
+
+    person = simulation.populations["person"]
+    with lsr_measurement_branches(simulation, period) as branches:
+        income_change = get_relative_income_change(*branches, period)
+        wage_change = get_relative_wage_change(*branches, period)
+    employment_income = person("employment_income_before_lsr", period)
+
+    variables_data = simulation.tax_benefit_system.variables
+    # Employment income inputs are moved to employment_income_before_lsr when
+    # the simulation is built, so employment income itself must be recomputed.
+    inputs = set(simulation.input_variables) - {"employment_income"}
+    results = {}
+    with temporary_branch(simulation, "lsr_scenario") as scenario_branch:
+        for income_elasticity, substitution_elasticity in elasticities:
+            response = employment_income * (
+                income_change * income_elasticity
+                + wage_change * substitution_elasticity
+            )
+            for variable, variable_data in variables_data.items():
+                if (
+                    variable not in inputs
+                    and not variable_data.is_input_variable()
+                ):
+                    scenario_branch.delete_arrays(variable)
+            scenario_branch.set_input(LSR_VARIABLE, period, response)
+            scenario = {LSR_VARIABLE: response}
+            for variable in variables:
+                population = scenario_branch.get_variable_population(variable)
+                scenario[variable] = population(variable, period)
+            results[income_elasticity, substitution_elasticity] = scenario
+    return results
@@ -0,0 +1,196 @@
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from policyengine_core.parameters import Parameter
+
+# LHA rate tables (before uprating), by BRMAs, categories, year and percentile.
+_LHA_RATE_TABLES: Dict[Tuple, np.ndarray] = {}
+_LHA_RENT_INDEX = None
+
+
+class LHARentIndex:
+    """Weekly rents from the List of Rents, sorted and stored contiguously by
+    year, BRMA and LHA category, so that any percentile of every group can be
+    read off in one vectorised step.
+
+    Args:
+        list_of_rents (pd.DataFrame): The List of Rents.
+    """
+
+    def __init__(self, list_of_rents: pd.DataFrame):
+        year, self.years = pd.factorize(
+            list_of_rents.year.values.astype(int), sort=True
+        )
+        brma, self.brmas = pd.factorize(list_of_rents.brma.values, sort=True)
+        category, self.categories = pd.factorize(
+            list_of_rents.lha_category.values, sort=True
+        )
+        group = (year * len(self.brmas) + brma) * len(
+            self.categories
+        ) + category
+        rents = list_of_rents.weekly_rent.values
+        order = np.lexsort((rents, group))
+        self.rents = rents[order]
+        self.counts = np.bincount(
+            group,
+            minlength=len(self.years) * len(self.brmas) * len(self.categories),
+        ).reshape(len(self.years), len(self.brmas), len(self.categories))
+        self.starts = (np.cumsum(self.counts) - self.counts.ravel()).reshape(
+            self.counts.shape
+        )
+
+    def quantiles(self, year: int, percentile: float) -> np.ndarray:
+        """Gets the given percentile of rents in each (BRMA, category) group,
+        interpolating linearly as pandas and NumPy do by default.
+
+        Args:
+            year (int): The year of the List of Rents (must be in the data).
+            percentile (float): The percentile, between 0 and 1.
+
+        Returns:
+            np.ndarray: The rents, with one row per BRMA and one column per category (in sorted name order).
+        """
+        year_index = np.searchsorted(self.years, year)
+        counts = self.counts[year_index]
+        starts = self.starts[year_index]
+        position = (np.maximum(counts, 1) - 1) * percentile
+        lower = np.floor(position).astype(int)
+        upper = np.minimum(lower + 1, np.maximum(counts - 1, 0))
+        fraction = position - lower
+        a = self.rents[np.minimum(starts + lower, len(self.rents) - 1)]
+        b = self.rents[np.minimum(starts + upper, len(self.rents) - 1)]
+        difference = b - a
+        quantiles = np.where(
+            fraction >= 0.5,
+            b - difference * (1 - fraction),
+            a + difference * fraction,
+        )
+        return np.where(counts > 0, quantiles, np.nan)
+
+
+def get_lha_rent_index() -> LHARentIndex:
+    """Gets the LHA rent index, building it from the List of Rents on first
+    use.
+
+    Returns:
+        LHARentIndex: The rent index.
+    """
+    global _LHA_RENT_INDEX
+    if _LHA_RENT_INDEX is None:
+        from policyengine_uk.data.gov import lha_list_of_rents
+
+        _LHA_RENT_INDEX = LHARentIndex(lha_list_of_rents)
+    return _LHA_RENT_INDEX
+
+
+def _get_positions(
+    index: pd.Index, names: Sequence[str], description: str
+) -> np.ndarray:
+    """Gets the position of each name in an index, raising an error for any
+    missing from it."""
+    positions = pd.Index(index).get_indexer(names)
+    if (positions == -1).any():
+        missing = [name for name, i in zip(names, positions) if i == -1]
+        raise ValueError(
+            f"These {description} are not in the List of Rents: {missing}."
+        )
+    return positions
+
+
+def get_lha_rate_table(
+    brmas: Sequence[str],
+    categories: Sequence[str],
+    year: int,
+    percentile: float,
+    private_rent_index: Parameter,
+) -> np.ndarray:
+    """Gets a dense table of weekly LHA rates, with one row per BRMA and one
+    column per LHA category, in the given orders (so that enum codes can
+    index it directly). Years after the List of Rents use its latest year,
+    uprated by the private rent index.
+
+    Args:
+        brmas (Sequence[str]): The BRMA names, in enum order.
+        categories (Sequence[str]): The LHA category names, in enum order.
+        year (int): The year of the rates.
+        percentile (float): The percentile of rents setting LHA rates.
+        private_rent_index (Parameter): The private rent index.
+
+    Returns:
+        np.ndarray: The weekly LHA rates.
+    """
+    rent_index = get_lha_rent_index()
+    year = int(year)
+    if year in rent_index.years:
+        data_year = year
+        uprating_index = 1
+    else:
+        data_year = int(rent_index.years.max())
+        uprating_index = private_rent_index(
+            f"{year}-01-01"
+        ) / private_rent_index(f"{data_year}-01-01")
+    key = (tuple(brmas), tuple(categories), data_year, float(percentile))
+    if key not in _LHA_RATE_TABLES:
+        quantiles = rent_index.quantiles(data_year, percentile)
+        brma_index = _get_positions(rent_index.brmas, brmas, "BRMAs")
+        category_index = _get_positions(
+            rent_index.categories, categories, "LHA categories"
+        )
+        _LHA_RATE_TABLES[key] = quantiles[np.ix_(brma_index, category_index)]
+    return _LHA_RATE_TABLES[key] * uprating_index
+
+
+def get_freeze_periods(
+    freeze_parameter: Parameter,
+) -> Tuple[List[str], List[str]]:
+    """Compiles a boolean freeze parameter into sorted freeze periods. The
+    result is stored on the parameter, and rebuilt if the parameter's values
+    have since been replaced (e.g. by a reform).
+
+    Args:
+        freeze_parameter (Parameter): The freeze parameter.
+
+    Returns:
+        Tuple[List[str], List[str]]: The start instants of each freeze, and the (exclusive) end instants.
+    """
+    compiled = getattr(freeze_parameter, "_freeze_periods", None)
+    if compiled is not None and compiled[0] is freeze_parameter.values_list:
+        return compiled[1:]
+    starts = []
+    ends = []
+    # The values list is in reverse chronological order.
+    for value_at_instant in reversed(freeze_parameter.values_list):
+        frozen = bool(value_at_instant.value)
+        if frozen and len(starts) == len(ends):
+            starts.append(value_at_instant.instant_str)
+        elif not frozen and len(starts) > len(ends):
+            ends.append(value_at_instant.instant_str)
+    if len(starts) > len(ends):
+        ends.append("9999-12-31")
+    freeze_parameter._freeze_periods = (
+        freeze_parameter.values_list,
+        starts,
+        ends,
+    )
+    return starts, ends
+
+
+def find_freeze_start(
+    freeze_parameter: Parameter, period: str
+) -> Optional[str]:
+    """Finds the first instant in which the current freeze was applied.
+    Returns none if the parameter is not frozen at the given instant.
+
+    Args:
+        freeze_parameter (Parameter): The freeze parameter.
+        period (str): The instant to search at.
+
+    Returns:
+        str: The first instant in which the current freeze was applied.
+    """
+    starts, ends = get_freeze_periods(freeze_parameter)
+    i = bisect_right(starts, str(period)) - 1
+    if i < 0 or str(period) >= ends[i]:
+        return None
+    return starts[i]
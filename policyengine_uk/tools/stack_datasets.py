@@ -1,7 +1,27 @@
+from typing import Dict, List, Union
 import numpy as np
 
+VariableTimePeriodData = Dict[str, Dict[str, np.ndarray]]
 
-def stack_datasets(data_1, data_2):
+
+def stack_datasets(
+    *datasets: Union[VariableTimePeriodData, List[VariableTimePeriodData]]
+) -> VariableTimePeriodData:
+    """Stacks datasets in variable-time-period format, offsetting the IDs of
+    each dataset by the largest ID stacked before it so that they stay
+    unique. Offsets are computed up front, and each variable and time period
+    is written once into a preallocated array, rather than re-concatenating
+    a growing dataset.
+
+    Args:
+        *datasets (Union[VariableTimePeriodData, List[VariableTimePeriodData]]): The datasets, or a single list of them. The first dataset's variables and time periods are stacked.
+
+    Returns:
+        VariableTimePeriodData: The stacked dataset.
+    """
+    if len(datasets) == 1 and isinstance(datasets[0], (list, tuple)):
+        datasets = datasets[0]
+    data_1 = datasets[0]
     assert isinstance(
         data_1[list(data_1.keys())[0]], dict
     ), "Data must be in variable-time-period format."
@@ -10,20 +30,23 @@ def stack_datasets(data_1, data_2):
     for variable in data_1:
         joined_data[variable] = {}
         for time_period in data_1[variable]:
-            if "_id" in variable:
-                joined_data[variable][time_period] = np.concatenate(
-                    [
-                        data_1[variable][time_period],
-                        data_2[variable][time_period]
-                        + data_1[variable][time_period].max(),
-                    ]
-                )
-            else:
-                joined_data[variable][time_period] = np.concatenate(
-                    [
-                        data_1[variable][time_period],
-                        data_2[variable][time_period],
-                    ]
-                )
+            arrays = [data[variable][time_period] for data in datasets]
+            stacked = np.empty(
+                (sum(len(array) for array in arrays),) + arrays[0].shape[1:],
+                dtype=np.result_type(*arrays),
+            )
+            start = 0
+            max_id = None
+            for array in arrays:
+                end = start + len(array)
+                if "_id" in variable and max_id is not None:
+                    np.add(array, max_id, out=stacked[start:end])
+                    max_id = max(max_id, stacked[start:end].max())
+                else:
+                    stacked[start:end] = array
+                    if "_id" in variable:
+                        max_id = array.max()
+                start = end
+            joined_data[variable][time_period] = stacked
 
     return joined_data
@@ -0,0 +1,226 @@
+import ast
+import inspect
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+from weakref import WeakKeyDictionary
+from policyengine_core.parameters import Parameter
+from policyengine_core.taxbenefitsystems import TaxBenefitSystem
+from policyengine_core.variables import Variable
+
+# The variables depending on each variable, by system (built on first use).
+_DEPENDENTS: Dict[TaxBenefitSystem, Dict[str, Set[str]]] = WeakKeyDictionary()
+
+
+def _get_names(node: ast.AST) -> Set[str]:
+    """Gets every identifier, attribute and string in a syntax tree."""
+    names = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name):
+            names.add(child.id)
+        elif isinstance(child, ast.Attribute):
+            names.add(child.attr)
+        elif isinstance(child, ast.Constant) and isinstance(child.value, str):
+            names.add(child.value)
+    return names
+
+
+@lru_cache(maxsize=None)
+def _parse_module(
+    file_path: str,
+) -> Tuple[Dict[int, Set[str]], Dict[str, Set[str]]]:
+    """Gets the names in each function of a Python file (by line number) and
+    in each module-level constant (by name)."""
+    with open(file_path) as f:
+        tree = ast.parse(f.read())
+    functions = {}
+    constants = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.FunctionDef):
+            names = _get_names(node)
+            functions[node.lineno] = names
+            for decorator in node.decorator_list:
+                functions[decorator.lineno] = names
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    constants[target.id] = _get_names(node.value)
+    return functions, constants
+
+
+def _get_function_names(function: Callable) -> Optional[Set[str]]:
+    """Gets the names in a function, and in the module-level constants (e.g.
+    lists of components) it uses, or None if its source cannot be found."""
+    code = function.__code__
+    try:
+        functions, constants = _parse_module(code.co_filename)
+    except (OSError, SyntaxError):
+        return None
+    if code.co_firstlineno not in functions:
+        return None
+    names = set(functions[code.co_firstlineno])
+    for name in names.intersection(constants):
+        names |= constants[name]
+    return names
+
+
+def _get_formula_names(formula: Callable) -> Optional[Set[str]]:
+    """Gets the names in a formula, in the variables and strings it closes
+    over (e.g. the variable a `change_over_baseline` formula compares with
+    its baseline), and in the package functions it calls (directly or
+    through other functions), or None if any of these cannot be analysed."""
+    names = set()
+    visited = set()
+    to_visit = [formula]
+    while to_visit:
+        function = to_visit.pop()
+        if function in visited:
+            continue
+        visited.add(function)
+        function_names = _get_function_names(function)
+        if function_names is None:
+            return None
+        names |= function_names
+        references = [
+            function.__globals__[name]
+            for name in function_names
+            if name in function.__globals__
+        ]
+        references += inspect.getclosurevars(function).nonlocals.values()
+        for value in references:
+            if isinstance(value, type) and issubclass(value, Variable):
+                names.update((value.__name__, f"baseline_{value.__name__}"))
+            elif isinstance(value, str):
+                names.add(value)
+            elif inspect.isfunction(value) and (
+                value.__module__ or ""
+            ).startswith("policyengine_uk"):
+                to_visit.append(value)
+    return names
+
+
+def _get_variable_lists(system: TaxBenefitSystem) -> Dict[str, Set[str]]:
+    """Gets the parameters listing variables (e.g. income components), by
+    path and by their final name (the attribute formulas read them by)."""
+    variable_lists = {}
+    for parameter in system.parameters.get_descendants():
+        if not isinstance(parameter, Parameter):
+            continue
+        variables = set()
+        for value in parameter.values_list:
+            if isinstance(value.value, list):
+                variables.update(
+                    item
+                    for item in value.value
+                    if isinstance(item, str) and item in system.variables
+                )
+        if variables:
+            variable_lists[parameter.name] = variables
+            variable_lists.setdefault(parameter.name.split(".")[-1], set())
+            variable_lists[parameter.name.split(".")[-1]] |= variables
+    return variable_lists
+
+
+def get_variable_dependencies(
+    system: TaxBenefitSystem,
+) -> Dict[str, Set[str]]:
+    """Gets the variables each variable may depend on. This over-approximates
+    the dependencies found when calculating, from each variable's `adds`,
+    `subtracts` and `defined_for`, and every variable named in its formulas
+    (directly, through module-level constants, closures or the package
+    functions they call, or through parameters listing variables, like
+    `p.income_tax_additions`). Variables with formulas which cannot be
+    analysed (e.g. without source) may depend on every variable.
+
+    Args:
+        system (TaxBenefitSystem): The tax-benefit system.
+
+    Returns:
+        Dict[str, Set[str]]: The dependencies of each variable.
+    """
+    variable_lists = _get_variable_lists(system)
+    dependencies = {}
+    for name, variable in system.variables.items():
+        names = set()
+        for components in (variable.adds, variable.subtracts):
+            if isinstance(components, str):
+                names |= variable_lists.get(components, set())
+            elif components is not None:
+                names.update(components)
+        if variable.defined_for is not None:
+            names.add(
+                getattr(variable.defined_for, "name", variable.defined_for)
+            )
+        for formula in variable.formulas.values():
+            formula_names = _get_formula_names(formula)
+            if formula_names is None:
+                # Formulas which cannot be analysed may use any variable.
+                names |= set(system.variables)
+                break
+            names |= formula_names
+            for list_name in formula_names.intersection(variable_lists):
+                names |= variable_lists[list_name]
+        dependencies[name] = names.intersection(system.variables) - {name}
+    return dependencies
+
+
+def get_reachable_variables(
+    system: TaxBenefitSystem, targets: Iterable[str]
+) -> Set[str]:
+    """Gets the variables which calculating the targets may need.
+
+    Args:
+        system (TaxBenefitSystem): The tax-benefit system.
+        targets (Iterable[str]): The variables to calculate.
+
+    Returns:
+        Set[str]: The targets and every variable they may depend on.
+    """
+    dependencies = get_variable_dependencies(system)
+    reachable = set()
+    to_visit = list(targets)
+    while to_visit:
+        variable = to_visit.pop()
+        if variable in reachable:
+            continue
+        reachable.add(variable)
+        to_visit.extend(dependencies.get(variable, ()))
+    return reachable
+
+
+def get_dependent_variables(
+    system: TaxBenefitSystem, variables: Iterable[str]
+) -> Set[str]:
+    """Gets the variables whose calculation may depend on the given variables
+    (directly or indirectly), e.g. those to recalculate when they change. The
+    reverse dependency graph is built once per system.
+
+    Args:
+        system (TaxBenefitSystem): The tax-benefit system.
+        variables (Iterable[str]): The changed variables.
+
+    Returns:
+        Set[str]: The variables depending on them (excluding the variables themselves, unless they depend on each other).
+    """
+    if system not in _DEPENDENTS:
+        dependents = {}
+        for variable, dependencies in get_variable_dependencies(
+            system
+        ).items():
+            for dependency in dependencies:
+                dependents.setdefault(dependency, set()).add(variable)
+        _DEPENDENTS[system] = dependents
+    dependents = _DEPENDENTS[system]
+    found = set()
+    to_visit = [
+        dependent
+        for variable in variables
+        for dependent in dependents.get(variable, ())
+    ]
+    while to_visit:
+        variable = to_visit.pop()
+        if variable in found:
+            continue
+        found.add(variable)
+        to_visit.extend(dependents.get(variable, ()))
+    return found
@@ -12,32 +12,47 @@ class sdlt_on_residential_property_transactions(Variable):
 
     def formula(household, period, parameters):
         stamp_duty = parameters(period).gov.hmrc.stamp_duty
-        # Tax on main-home purchases
-        price_limit = stamp_duty.residential.purchase.main.first.max
         price = household("main_residential_property_purchased", period)
-        residential_purchase_qualifies_as_first_buy = household(
+        is_first_home = household(
             "main_residential_property_purchased_is_first_home", period
-        ) & (price < price_limit)
-        main_residential_purchase_tax = where(
-            residential_purchase_qualifies_as_first_buy,
-            stamp_duty.residential.purchase.main.first.rate.calc(price),
-            stamp_duty.residential.purchase.main.subsequent.calc(price),
         )
-        # Tax on second-home purchases
         second_home_price = household(
             "additional_residential_property_purchased", period
         )
-        price = where(
-            second_home_price < stamp_duty.residential.purchase.additional.min,
-            0,
+
+        def residential_purchase_tax(price, is_first_home, second_home_price):
+            # Tax on main-home purchases
+            price_limit = stamp_duty.residential.purchase.main.first.max
+            residential_purchase_qualifies_as_first_buy = is_first_home & (
+                price < price_limit
+            )
+            main_residential_purchase_tax = where(
+                residential_purchase_qualifies_as_first_buy,
+                stamp_duty.residential.purchase.main.first.rate.calc(price),
+                stamp_duty.residential.purchase.main.subsequent.calc(price),
+            )
+            # Tax on second-home purchases
+            price = where(
+                second_home_price
+                < stamp_duty.residential.purchase.additional.min,
+                0,
+                second_home_price,
+            )
+            additional_residential_purchase_tax = (
+                stamp_duty.residential.purchase.additional.rate.calc(price)
+            )
+            return (
+                main_residential_purchase_tax
+                + additional_residential_purchase_tax
+            )
+
+        return evaluate_on_subset(
+            household("sdlt_liable", period),
+            residential_purchase_tax,
+            price,
+            is_first_home,
             second_home_price,
         )
-        additional_residential_purchase_tax = (
-            stamp_duty.residential.purchase.additional.rate.calc(price)
-        )
-        return (
-            main_residential_purchase_tax + additional_residential_purchase_tax
-        )
 
 
 class sdlt_on_residential_property_rent(Variable):
@@ -53,9 +68,15 @@ class sdlt_on_residential_property_rent(Variable):
         stamp_duty = parameters(period).gov.hmrc.stamp_duty
         cumulative_rent = household("cumulative_residential_rent", period)
         rent = household("rent", period)
-        return stamp_duty.residential.rent.calc(
-            cumulative_rent + rent
-        ) - stamp_duty.residential.rent.calc(cumulative_rent)
+
+        def rent_tax(cumulative_rent, rent):
+            return stamp_duty.residential.rent.calc(
+                cumulative_rent + rent
+            ) - stamp_duty.residential.rent.calc(cumulative_rent)
+
+        return evaluate_on_subset(
+            household("sdlt_liable", period), rent_tax, cumulative_rent, rent
+        )
 
 
 class sdlt_on_non_residential_property_transactions(Variable):
@@ -70,7 +91,11 @@ class sdlt_on_non_residential_property_transactions(Variable):
     def formula(household, period, parameters):
         stamp_duty = parameters(period).gov.hmrc.stamp_duty
         price = household("non_residential_property_purchased", period)
-        return stamp_duty.non_residential.purchase.calc(price)
+        return evaluate_on_subset(
+            household("sdlt_liable", period),
+            stamp_duty.non_residential.purchase.calc,
+            price,
+        )
 
 
 class sdlt_on_non_residential_property_rent(Variable):
@@ -86,9 +111,15 @@ class sdlt_on_non_residential_property_rent(Variable):
         stamp_duty = parameters(period).gov.hmrc.stamp_duty
         cumulative_rent = household("cumulative_non_residential_rent", period)
         rent = household("non_residential_rent", period)
-        return stamp_duty.non_residential.rent.calc(
-            cumulative_rent + rent
-        ) - stamp_duty.non_residential.rent.calc(cumulative_rent)
+
+        def rent_tax(cumulative_rent, rent):
+            return stamp_duty.non_residential.rent.calc(
+                cumulative_rent + rent
+            ) - stamp_duty.non_residential.rent.calc(cumulative_rent)
+
+        return evaluate_on_subset(
+            household("sdlt_liable", period), rent_tax, cumulative_rent, rent
+        )
 
 
 class sdlt_on_transactions(Variable):
@@ -132,9 +163,8 @@ class sdlt_liable(Variable):
     def formula(household, period):
         country = household("country", period)
         countries = country.possible_values
-        return np.isin(
-            country.decode_to_str(),
-            [countries.ENGLAND.name, countries.NORTHERN_IRELAND.name],
+        return (country == countries.ENGLAND) | (
+            country == countries.NORTHERN_IRELAND
         )
 
 
@@ -11,12 +11,12 @@ class domestic_rates(Variable):
     def formula(household, period, parameters):
         rates = parameters(period).gov.local_authorities.domestic_rates.rates
         local_authority = household("local_authority", period)
-        rate_defined = pd.Series(local_authority.decode_to_str()).isin(
-            rates._children
-        )
-        percent = np.zeros(household.count, dtype=float)
-        if any(rate_defined):
-            percent[rate_defined] = rates[local_authority[rate_defined]]
+        percent = enum_parameter_array(rates, local_authority.possible_values)[
+            local_authority
+        ]
+        rate_defined = ~np.isnan(percent)
+        if rate_defined.any():
+            percent = where(rate_defined, percent, 0)
             main_residence_value = household("main_residence_value", period)
             return percent * main_residence_value
         else:
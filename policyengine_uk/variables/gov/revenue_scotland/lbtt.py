@@ -11,27 +11,43 @@ class lbtt_on_residential_property_transactions(Variable):
 
     def formula(household, period, parameters):
         lbtt = parameters(period).gov.revenue_scotland.lbtt
-        # Tax on main-home purchases
         price = household("main_residential_property_purchased", period)
         residential_purchase_qualifies_as_first_buy = household(
             "main_residential_property_purchased_is_first_home", period
         )
-        main_residential_purchase_tax = where(
-            residential_purchase_qualifies_as_first_buy,
-            lbtt.residential.first_time_buyer_rate.calc(price),
-            lbtt.residential.rate.calc(price),
-        )
-        # Tax on second-home purchases
         second_home_price = household(
             "additional_residential_property_purchased", period
         )
-        lbtt2 = lbtt.residential.rate.calc(second_home_price)
-        surcharge = (
-            lbtt.residential.additional_residence_surcharge * second_home_price
-        )
-        additional_residential_purchase_tax = lbtt2 + surcharge
-        return (
-            main_residential_purchase_tax + additional_residential_purchase_tax
+
+        def residential_purchase_tax(
+            price,
+            residential_purchase_qualifies_as_first_buy,
+            second_home_price,
+        ):
+            # Tax on main-home purchases
+            main_residential_purchase_tax = where(
+                residential_purchase_qualifies_as_first_buy,
+                lbtt.residential.first_time_buyer_rate.calc(price),
+                lbtt.residential.rate.calc(price),
+            )
+            # Tax on second-home purchases
+            lbtt2 = lbtt.residential.rate.calc(second_home_price)
+            surcharge = (
+                lbtt.residential.additional_residence_surcharge
+                * second_home_price
+            )
+            additional_residential_purchase_tax = lbtt2 + surcharge
+            return (
+                main_residential_purchase_tax
+                + additional_residential_purchase_tax
+            )
+
+        return evaluate_on_subset(
+            household("lbtt_liable", period),
+            residential_purchase_tax,
+            price,
+            residential_purchase_qualifies_as_first_buy,
+            second_home_price,
         )
 
 
@@ -47,9 +63,15 @@ class lbtt_on_residential_property_rent(Variable):
         lbtt = parameters(period).gov.revenue_scotland.lbtt
         cumulative_rent = household("cumulative_residential_rent", period)
         rent = household("rent", period)
-        lbtt_cumulative_rent = lbtt.rent.calc(cumulative_rent)
-        lbtt_total_rent = lbtt.rent.calc(cumulative_rent + rent)
-        return lbtt_total_rent - lbtt_cumulative_rent
+
+        def rent_tax(cumulative_rent, rent):
+            return lbtt.rent.calc(cumulative_rent + rent) - lbtt.rent.calc(
+                cumulative_rent
+            )
+
+        return evaluate_on_subset(
+            household("lbtt_liable", period), rent_tax, cumulative_rent, rent
+        )
 
 
 class lbtt_on_non_residential_property_transactions(Variable):
@@ -63,7 +85,9 @@ class lbtt_on_non_residential_property_transactions(Variable):
     def formula(household, period, parameters):
         lbtt = parameters(period).gov.revenue_scotland.lbtt
         price = household("non_residential_property_purchased", period)
-        return lbtt.non_residential.calc(price)
+        return evaluate_on_subset(
+            household("lbtt_liable", period), lbtt.non_residential.calc, price
+        )
 
 
 class lbtt_on_non_residential_property_rent(Variable):
@@ -80,9 +104,15 @@ class lbtt_on_non_residential_property_rent(Variable):
         lbtt = parameters(period).gov.revenue_scotland.lbtt
         cumulative_rent = household("cumulative_non_residential_rent", period)
         rent = household("non_residential_rent", period)
-        lbtt_cumulative_rent = lbtt.rent.calc(cumulative_rent)
-        lbtt_total_rent = lbtt.rent.calc(cumulative_rent + rent)
-        return lbtt_total_rent - lbtt_cumulative_rent
+
+        def rent_tax(cumulative_rent, rent):
+            return lbtt.rent.calc(cumulative_rent + rent) - lbtt.rent.calc(
+                cumulative_rent
+            )
+
+        return evaluate_on_subset(
+            household("lbtt_liable", period), rent_tax, cumulative_rent, rent
+        )
 
 
 class lbtt_liable(Variable):
@@ -1,4 +1,20 @@
 from policyengine_uk.model_api import *
+from policyengine_uk.tools.labor_supply_responses import (
+    get_relative_income_change,
+    get_relative_wage_change,
+    lsr_measurement_branches,
+)
+
+
+def _get_measurement_branches(simulation):
+    """Gets the branches `lsr_measurement_branches` opened for the response
+    being calculated."""
+    return (
+        simulation.get_branch("lsr_measurement"),
+        simulation.get_branch("baseline").get_branch(
+            "baseline_lsr_measurement"
+        ),
+    )
 
 
 class relative_income_change(Variable):
@@ -10,30 +26,8 @@ class relative_income_change(Variable):
     requires_computation_after = "employment_income_behavioral_response"
 
     def formula(person, period, parameters):
-        simulation = person.simulation
-        measurement_branch = simulation.get_branch("lsr_measurement")
-        baseline_branch = simulation.get_branch("baseline").get_branch(
-            "baseline_lsr_measurement"
-        )
-        measurement_person = measurement_branch.populations["person"]
-        baseline_person = baseline_branch.populations["person"]
-        baseline_net_income = baseline_person.household(
-            "household_net_income", period
-        )
-        net_income = measurement_person.household(
-            "household_net_income", period
-        )
-        income_change_bound = parameters(
-            period
-        ).gov.simulation.labor_supply_responses.bounds.income_change
-        # _c suffix for "clipped"
-        baseline_net_income_c = np.clip(baseline_net_income, 1, None)
-        net_income_c = np.clip(net_income, 1, None)
-        relative_change = (
-            net_income_c - baseline_net_income_c
-        ) / baseline_net_income_c
-        return np.clip(
-            relative_change, -income_change_bound, income_change_bound
+        return get_relative_income_change(
+            *_get_measurement_branches(person.simulation), period
         )
 
 
@@ -46,25 +40,9 @@ class relative_wage_change(Variable):
     requires_computation_after = "employment_income_behavioral_response"
 
     def formula(person, period, parameters):
-        simulation = person.simulation
-        measurement_branch = simulation.get_branch("lsr_measurement")
-        baseline_branch = simulation.get_branch("baseline").get_branch(
-            "baseline_lsr_measurement"
+        return get_relative_wage_change(
+            *_get_measurement_branches(person.simulation), period
         )
-        measurement_person = measurement_branch.populations["person"]
-        baseline_person = baseline_branch.populations["person"]
-        baseline_mtr = baseline_person("marginal_tax_rate", period)
-        baseline_wage = 1 - baseline_mtr
-        mtr = measurement_person("marginal_tax_rate", period)
-        wage_rate = 1 - mtr
-        # _c suffix for "clipped"
-        baseline_wage_c = np.where(baseline_wage == 0, 0.01, baseline_wage)
-        wage_rate_c = np.where(wage_rate == 0, 0.01, wage_rate)
-        relative_change = (wage_rate_c - baseline_wage_c) / baseline_wage_c
-        wage_change_bound = parameters(
-            period
-        ).gov.simulation.labor_supply_responses.bounds.effective_wage_rate_change
-        return np.clip(relative_change, -wage_change_bound, wage_change_bound)
 
 
 class income_elasticity_lsr(Variable):
@@ -114,32 +92,12 @@ class employment_income_behavioral_response(Variable):
         if lsr.income_elasticity == 0 and lsr.substitution_elasticity == 0:
             return 0
 
-        measurement_branch = simulation.get_branch(
-            "lsr_measurement", clone_system=True
-        )  # A branch without LSRs
-        baseline_branch = simulation.get_branch("baseline").get_branch(
-            "baseline_lsr_measurement", clone_system=True
-        )  # Already created by default
-
-        # (system with LSRs) <- (system without LSRs used to calculate LSRs)
-        #                      |
-        #                      * -(baseline system without LSRs used to calculate LSRs)
-
-        for branch in [measurement_branch, baseline_branch]:
-            branch.tax_benefit_system.neutralize_variable(
-                "employment_income_behavioral_response"
-            )
-            branch.set_input(
-                "employment_income_before_lsr",
+        with lsr_measurement_branches(simulation, period):
+            return add(
+                person,
                 period,
-                person("employment_income_before_lsr", period),
+                [
+                    "income_elasticity_lsr",
+                    "substitution_elasticity_lsr",
+                ],
             )
-
-        return add(
-            person,
-            period,
-            [
-                "income_elasticity_lsr",
-                "substitution_elasticity_lsr",
-            ],
-        )
@@ -30,18 +30,20 @@ class ltt_on_residential_property_transactions(Variable):
         main_home_price = household(
             "main_residential_property_purchased", period
         )
-        primary_residential_purchase_tax = ltt.residential.primary.calc(
-            main_home_price
-        )
         second_home_price = household(
             "additional_residential_property_purchased", period
         )
-        additional_residential_purchase_tax = ltt.residential.higher_rate.calc(
-            second_home_price
-        )
-        return (
-            primary_residential_purchase_tax
-            + additional_residential_purchase_tax
+
+        def residential_purchase_tax(main_home_price, second_home_price):
+            return ltt.residential.primary.calc(
+                main_home_price
+            ) + ltt.residential.higher_rate.calc(second_home_price)
+
+        return evaluate_on_subset(
+            household("ltt_liable", period),
+            residential_purchase_tax,
+            main_home_price,
+            second_home_price,
         )
 
 
@@ -59,9 +61,15 @@ class ltt_on_residential_property_rent(Variable):
         ltt = parameters(period).gov.wra.land_transaction_tax
         cumulative_rent = household("cumulative_residential_rent", period)
         rent = household("rent", period)
-        ltt_on_cumulative_rent = ltt.rent.calc(cumulative_rent)
-        ltt_on_total_rent = ltt.rent.calc(cumulative_rent + rent)
-        return ltt_on_total_rent - ltt_on_cumulative_rent
+
+        def rent_tax(cumulative_rent, rent):
+            return ltt.rent.calc(cumulative_rent + rent) - ltt.rent.calc(
+                cumulative_rent
+            )
+
+        return evaluate_on_subset(
+            household("ltt_liable", period), rent_tax, cumulative_rent, rent
+        )
 
 
 class ltt_on_non_residential_property_transactions(Variable):
@@ -77,8 +85,9 @@ class ltt_on_non_residential_property_transactions(Variable):
     def formula(household, period, parameters):
         ltt = parameters(period).gov.wra.land_transaction_tax
         price = household("non_residential_property_purchased", period)
-        non_residential_purchase_tax = ltt.non_residential.calc(price)
-        return household("ltt_liable", period) * non_residential_purchase_tax
+        return evaluate_on_subset(
+            household("ltt_liable", period), ltt.non_residential.calc, price
+        )
 
 
 class ltt_on_non_residential_property_rent(Variable):
@@ -93,9 +102,15 @@ class ltt_on_non_residential_property_rent(Variable):
         ltt = parameters(period).gov.wra.land_transaction_tax
         cumulative_rent = household("cumulative_non_residential_rent", period)
         rent = household("non_residential_rent", period)
-        ltt_on_cumulative_rent = ltt.rent.calc(cumulative_rent)
-        ltt_on_total_rent = ltt.rent.calc(cumulative_rent + rent)
-        return ltt_on_total_rent - ltt_on_cumulative_rent
+
+        def rent_tax(cumulative_rent, rent):
+            return ltt.rent.calc(cumulative_rent + rent) - ltt.rent.calc(
+                cumulative_rent
+            )
+
+        return evaluate_on_subset(
+            household("ltt_liable", period), rent_tax, cumulative_rent, rent
+        )
 
 
 class ltt_on_transactions(Variable):
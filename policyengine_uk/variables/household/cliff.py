@@ -1,4 +1,5 @@
 from policyengine_uk.model_api import *
+from policyengine_uk.tools.branches import temporary_branch
 
 
 class cliff_evaluated(Variable):
@@ -30,25 +31,25 @@ class cliff_gap(Variable):
         adult_index_values = person("adult_index", period)
         cliff_adult_count = 2
         for adult_index in range(1, 1 + cliff_adult_count):
-            alt_simulation = simulation.get_branch(
-                f"adult_{adult_index}_2k_pay_rise"
-            )
-            mask = adult_index_values == adult_index
-            for variable in simulation.tax_benefit_system.variables:
-                if variable not in simulation.input_variables:
-                    alt_simulation.delete_arrays(variable)
-            alt_simulation.set_input(
-                "employment_income",
-                period,
-                person("employment_income", period) + mask * DELTA,
-            )
-            alt_person = alt_simulation.person
-            household_net_income = person.household(
-                "household_net_income", period
-            )
-            household_net_income_higher_earnings = alt_person.household(
-                "household_net_income", period
-            )
+            with temporary_branch(
+                simulation, f"adult_{adult_index}_2k_pay_rise"
+            ) as alt_simulation:
+                mask = adult_index_values == adult_index
+                for variable in simulation.tax_benefit_system.variables:
+                    if variable not in simulation.input_variables:
+                        alt_simulation.delete_arrays(variable)
+                alt_simulation.set_input(
+                    "employment_income",
+                    period,
+                    person("employment_income", period) + mask * DELTA,
+                )
+                alt_person = alt_simulation.person
+                household_net_income = person.household(
+                    "household_net_income", period
+                )
+                household_net_income_higher_earnings = alt_person.household(
+                    "household_net_income", period
+                )
             increase = (
                 household_net_income_higher_earnings - household_net_income
             )
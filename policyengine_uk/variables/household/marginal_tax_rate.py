@@ -1,5 +1,6 @@
 from policyengine_uk.model_api import *
 from policyengine_core.variables import Variable
+from policyengine_uk.tools.branches import temporary_branch
 
 
 class marginal_tax_rate(Variable):
@@ -16,31 +17,31 @@ class marginal_tax_rate(Variable):
         adult_index_values = person("adult_index", period)
         DELTA = 1_000
         for adult_index in [1, 2]:
-            alt_simulation = simulation.get_branch(
-                f"adult_{adult_index}_pay_rise"
-            )
-            mask = adult_index_values == adult_index
-            for variable in simulation.tax_benefit_system.variables:
-                variable_data = simulation.tax_benefit_system.variables[
-                    variable
-                ]
-                if (
-                    variable not in simulation.input_variables
-                    and not variable_data.is_input_variable()
-                ):
-                    alt_simulation.delete_arrays(variable)
-            alt_simulation.set_input(
-                "employment_income",
-                period,
-                person("employment_income", period) + mask * DELTA,
-            )
-            alt_person = alt_simulation.person
-            household_net_income = person.household(
-                "household_net_income", period
-            )
-            household_net_income_higher_earnings = alt_person.household(
-                "household_net_income", period
-            )
+            with temporary_branch(
+                simulation, f"adult_{adult_index}_pay_rise"
+            ) as alt_simulation:
+                mask = adult_index_values == adult_index
+                for variable in simulation.tax_benefit_system.variables:
+                    variable_data = simulation.tax_benefit_system.variables[
+                        variable
+                    ]
+                    if (
+                        variable not in simulation.input_variables
+                        and not variable_data.is_input_variable()
+                    ):
+                        alt_simulation.delete_arrays(variable)
+                alt_simulation.set_input(
+                    "employment_income",
+                    period,
+                    person("employment_income", period) + mask * DELTA,
+                )
+                alt_person = alt_simulation.person
+                household_net_income = person.household(
+                    "household_net_income", period
+                )
+                household_net_income_higher_earnings = alt_person.household(
+                    "household_net_income", period
+                )
             increase = (
                 household_net_income_higher_earnings - household_net_income
             )
@@ -78,9 +78,6 @@ class state_pension(Variable):
             return 0
         relative_increase = gov.contrib.cec.state_pension_increase
         uprating = 1 + relative_increase
-        sp = gov.dwp.state_pension
-        gender = person("gender", period).decode_to_str()
-        is_sp_age = person("is_SP_age", period)
         return add(
             person,
             period,
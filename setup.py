@@ -58,7 +58,10 @@ setup(
             "survey-enhance",
             "wheel",
             "yaml-changelog>=0.1.7",
-        ]
+        ],
+        "parquet": [
+            "pyarrow",
+        ],
     },
     # Windows CI requires Python 3.9.
     python_requires=">=3.7",